@@ -9,8 +9,8 @@ from omegaconf import OmegaConf, DictConfig
 from rich.logging import RichHandler
 
 from auto_dubbing.mixing import extract_audio, separate_vocals, combine_audio, mix_audio_with_video
-from auto_dubbing.transcription import transcribe, speaker_diarization, align_speaker_labels, translate, merge_segments
-from auto_dubbing.tts import trim_vc_start, tts, time_stretch_vc, split_audio_by_utterance, process_all_voice_conversions, build_all_reference_audios
+from auto_dubbing.transcription import transcribe, speaker_diarization, align_speaker_labels, translate
+from auto_dubbing.tts import TTS_CACHE_DIR, trim_vc_start, tts, time_stretch_vc, split_audio_by_utterance, process_all_voice_conversions, build_all_reference_audios
 
 logger = logging.getLogger(__name__)
 
@@ -61,17 +61,17 @@ def run_pipeline() -> None:
     # 2) Transcribe & translate vocals
     transcript, language = transcribe(vocals, base_dir)
     diarization = speaker_diarization(str(vocals), assembly_key, base_dir)
-    align_speaker_labels(transcript, diarization, base_dir)
-    full_transcript = merge_segments(base_dir, max_gap=0.45)
+    full_transcript = align_speaker_labels(transcript, diarization, base_dir, max_gap=0.45)
     translate(full_transcript, language.upper(), config.translation.target_language, deepl_key)
 
     # 3) TTS, stretch, build references, voice conversion
     split_audio_by_utterance(full_transcript, vocals, base_dir)
     build_all_reference_audios(base_dir, reference_window=1)
-    tts(full_transcript, base_dir)
-    process_all_voice_conversions(base_dir)
+    tts(full_transcript, base_dir, cache_dir=config.paths.get("tts_cache_folder", TTS_CACHE_DIR))
+    vc_config = config.get("voice_conversion", {})
+    process_all_voice_conversions(base_dir, min_duration_ms=vc_config.get("min_duration_ms", 200), devices=vc_config.get("devices"))
     trim_vc_start(base_dir)
-    time_stretch_vc(base_dir, full_transcript)
+    time_stretch_vc(base_dir, full_transcript, backend=config.get("time_stretch", {}).get("backend", "ffmpeg"))
 
     # 4) Remix background, mix vocals & background, combine audio with video
     final_audio = combine_audio(base_dir, background, full_transcript)
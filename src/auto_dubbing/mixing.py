@@ -1,14 +1,24 @@
 import os
 import subprocess
 import shutil
-import glob
 import logging
-import json
+from functools import lru_cache
 from pathlib import Path
+import numpy as np
+import soundfile as sf
+import torch
+from demucs.apply import apply_model
+from demucs.audio import convert_audio, save_audio
+from demucs.pretrained import get_model
 from pydub import AudioSegment
 
+from auto_dubbing.utils import load_transcript, load_wav, run_command, save_wav
+
 logger = logging.getLogger(__name__)
 
+# NumPy sample types of pydub's (signed) sample widths
+_SAMPLE_DTYPES = {1: np.int8, 2: np.int16, 4: np.int32}
+
 
 def extract_audio(input_video: str, output_dir: str) -> str:
     """
@@ -51,38 +61,132 @@ def extract_audio(input_video: str, output_dir: str) -> str:
     return output_audio
 
 
-def separate_vocals(input_audio: str, output_dir: str) -> tuple[str, str]:
+@lru_cache(maxsize=None)
+def _get_demucs_model(name: str):
     """
-    Separate a WAV audio file into vocals and background audio using Demucs (2-stem mode).
+    Load a pretrained Demucs model once per process, so separating several files only pays for the weights once.
 
     Args:
-        input_audio (str): Path to the source WAV file.
-        output_dir (str): Base directory where processed outputs will be saved.
+        name (str): Name of the pretrained model (e.g. "mdx_extra_q").
 
     Returns:
-        tuple[str, str]: A tuple containing the paths to the separated vocals and background audio files.
+        The loaded Demucs model (or bag of models), in evaluation mode.
+    """
+    model = get_model(name)
+    model.eval()
+    return model
+
+
+def _demucs_jobs(device: str) -> int:
+    """
+    Number of parallel Demucs jobs for a device. Parallel jobs only help on CPU, and multiply memory use.
+
+    Args:
+        device (str): Torch device the model runs on ("cuda" or "cpu").
+
+    Returns:
+        int: One job per CPU core on CPU, 0 (no parallel jobs) otherwise.
+    """
+    return (os.cpu_count() or 1) if device == "cpu" else 0
+
+
+def _separate_in_process(model_name: str, input_audio: str, vocals_path: str, background_path: str,
+                         device: str, segment: int | None):
+    """
+    Separate vocals and background with a cached Demucs model, following what the demucs CLI does in 2-stem mode.
+
+    Args:
+        model_name (str):      Name of the pretrained Demucs model.
+        input_audio (str):     Path to the source WAV file.
+        vocals_path (str):     Path to write the vocals to.
+        background_path (str): Path to write the background (all other stems summed) to.
+        device (str):          Torch device to run the model on ("cuda" or "cpu").
+        segment (int | None):  Length in seconds of the chunks processed at a time (the model's default if None).
+    """
+    model = _get_demucs_model(model_name)
+
+    samples, sample_rate = sf.read(input_audio, dtype="float32", always_2d=True)
+    wav = convert_audio(torch.from_numpy(samples.T), sample_rate, model.samplerate, model.audio_channels)
+
+    # Normalize like the CLI, and undo it on the separated sources
+    ref = wav.mean(0)
+    wav = (wav - ref.mean()) / ref.std()
+    with torch.no_grad():
+        sources = apply_model(model, wav[None], device=device, split=True, overlap=0.25,
+                              num_workers=_demucs_jobs(device), segment=segment)[0]
+    sources = sources * ref.std() + ref.mean()
+
+    vocals_idx = model.sources.index("vocals")
+    background = sum(source for i, source in enumerate(sources) if i != vocals_idx)
+    save_audio(sources[vocals_idx], vocals_path, samplerate=model.samplerate)
+    save_audio(background, background_path, samplerate=model.samplerate)
+
+
+def _separate_cli(model_name: str, input_audio: str, output_dir: str, vocals_path: str, background_path: str,
+                  device: str, segment: int | None):
+    """
+    Separate vocals and background by running the demucs command line tool in 2-stem mode.
+
+    Args:
+        model_name (str):      Name of the pretrained Demucs model.
+        input_audio (str):     Path to the source WAV file.
+        output_dir (str):      Directory in which demucs writes its temporary model folder.
+        vocals_path (str):     Path to move the vocals to.
+        background_path (str): Path to move the background to.
+        device (str):          Torch device to run the model on ("cuda" or "cpu").
+        segment (int | None):  Length in seconds of the chunks processed at a time (the model's default if None).
     """
-    # Model choice
-    model = "mdx_extra_q"
-    logger.info("Running Demucs model %r on %s", model, input_audio)
-    
     # Build Demucs command
     cmd = [
         "demucs",
-        "-n", model,
+        "-n", model_name,
         "--two-stems=vocals",
+        "-d", device,
         "--out", output_dir,
-        input_audio
+        "--filename", "{stem}.{ext}",  # write the stems straight into the model folder
     ]
-    # Run Demucs command
-    subprocess.run(cmd, check=True)
+    jobs = _demucs_jobs(device)
+    if jobs:
+        cmd += ["-j", str(jobs)]
+    if segment is not None:
+        cmd += ["--segment", str(segment)]
+    cmd.append(input_audio)
+    # Run Demucs command, keeping only the end of its progress output for errors
+    run_command(cmd)
+
+    # Move the stems out of the temporary model folder; both folders are under output_dir, so this is a rename
+    model_dir = os.path.join(output_dir, model_name)
+    os.replace(os.path.join(model_dir, "vocals.wav"),    vocals_path)
+    os.replace(os.path.join(model_dir, "no_vocals.wav"), background_path)
+
+    # Clean up temp model folder, which is empty unless something else was left in it
+    try:
+        os.rmdir(model_dir)
+    except OSError:
+        shutil.rmtree(model_dir, ignore_errors=True)
+    logger.debug("Removed temporary folder %s", model_dir)
+
+
+def separate_vocals(input_audio: str, output_dir: str, segment: int | None = 10) -> tuple[str, str]:
+    """
+    Separate a WAV audio file into vocals and background audio using Demucs (2-stem mode).
+    Runs on the GPU when CUDA is available, and otherwise splits the work over all CPU cores.
+    The model is run in-process and kept loaded for later calls; set DEMUCS_SUBPROCESS=1 to run the demucs
+    command line tool instead.
 
-    # Locate the temporary model folder
-    model_dir = os.path.join(output_dir, model)
+    Args:
+        input_audio (str): Path to the source WAV file.
+        output_dir (str): Base directory where processed outputs will be saved.
+        segment (int | None): Length in seconds of the chunks Demucs processes at a time, bounding its memory use
+                              on long inputs (Demucs' default if None).
 
-    # Glob for the two stems and pick the first match
-    vocals_src     = glob.glob(os.path.join(model_dir, "**", "vocals.wav"),     recursive=True)[0]
-    background_src = glob.glob(os.path.join(model_dir, "**", "no_vocals.wav"), recursive=True)[0]
+    Returns:
+        tuple[str, str]: A tuple containing the paths to the separated vocals and background audio files.
+    """
+    # Model choice
+    model = "mdx_extra_q"
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    logger.info("Running Demucs model %r on %s (%s)", model, input_audio, device)
 
     # Prepare the separated folder
     sep_dir = os.path.join(output_dir, "separated_audio")
@@ -90,20 +194,60 @@ def separate_vocals(input_audio: str, output_dir: str) -> tuple[str, str]:
     vocals_path     = os.path.join(sep_dir, "vocals.wav")
     background_path = os.path.join(sep_dir, "background.wav")
 
-    # Move them out
-    shutil.move(vocals_src,     vocals_path)
-    shutil.move(background_src, background_path)
+    if os.environ.get("DEMUCS_SUBPROCESS") == "1":
+        _separate_cli(model, input_audio, output_dir, vocals_path, background_path, device, segment)
+    else:
+        _separate_in_process(model, input_audio, vocals_path, background_path, device, segment)
     logger.info("Saved vocal audio to %s", vocals_path)
     logger.info("Saved background audio to %s", background_path)
 
-    # Clean up temp model folder
-    shutil.rmtree(model_dir, ignore_errors=True)
-    logger.debug("Removed temporary folder %s", model_dir)
-
     #Return the paths
     return vocals_path, background_path
 
 
+def overlay_clips(background: AudioSegment, clips: list[tuple[int, AudioSegment]]) -> AudioSegment:
+    """
+    Overlay clips onto a background track in one pass, like repeated AudioSegment.overlay() calls but without
+    copying the whole background for every clip. All audio is converted to the highest channel count, frame rate
+    and sample width among the inputs (as overlay() does), and summed in a NumPy buffer that is clipped once.
+
+    Args:
+        background (AudioSegment):               The audio to overlay the clips onto.
+        clips (list[tuple[int, AudioSegment]]):  (position in milliseconds, clip) pairs. Clips running past the end
+                                                 of the background are cut off.
+
+    Returns:
+        AudioSegment: The mixed audio, as long as the background.
+    """
+    segments = [background] + [clip for _, clip in clips]
+    channels = max(seg.channels for seg in segments)
+    frame_rate = max(seg.frame_rate for seg in segments)
+    sample_width = max(seg.sample_width for seg in segments)
+    dtype = _SAMPLE_DTYPES[sample_width]
+
+    def samples(seg: AudioSegment) -> np.ndarray:
+        seg = seg.set_channels(channels).set_frame_rate(frame_rate).set_sample_width(sample_width)
+        return np.frombuffer(seg.raw_data, dtype=dtype).reshape(-1, channels)
+
+    # Sum in a wider type, so overlapping clips only saturate once at the end. 32-bit holds the sum of
+    # thousands of overlapping 8/16-bit clips; only 24/32-bit audio needs 64-bit
+    mix = samples(background).astype(np.int32 if sample_width <= 2 else np.int64)
+    n_frames = len(mix)
+    for position, clip in clips:
+        start = min(int(position * frame_rate / 1000), n_frames)
+        frames = samples(clip)[:n_frames - start]
+        mix[start:start + len(frames)] += frames
+
+    info = np.iinfo(dtype)
+    np.clip(mix, info.min, info.max, out=mix)
+    return AudioSegment(
+        data=mix.astype(dtype).tobytes(),
+        sample_width=sample_width,
+        frame_rate=frame_rate,
+        channels=channels,
+    )
+
+
 def combine_audio(base_dir: str, background_audio_path: str, transcript_path: str) -> str:
     """
     Overlay all voice-converted (VC) utterance clips onto a background audio track according to their timestamps in the transcript,
@@ -122,13 +266,13 @@ def combine_audio(base_dir: str, background_audio_path: str, transcript_path: st
     # Check and load transcript
     if not os.path.isfile(transcript_path):
         raise FileNotFoundError(f"Transcript not found: {transcript_path}")
-    with open(transcript_path, "r", encoding="utf-8") as f:
-        transcript = json.load(f)
+    transcript, _ = load_transcript(transcript_path)
 
     # Load the background audio as the base for the final mix
-    final_audio = AudioSegment.from_file(background_audio_path)
+    background = load_wav(background_audio_path)
     os.makedirs(base_dir, exist_ok=True)
 
+    clips: list[tuple[int, AudioSegment]] = []
     speaker_counts: dict[str, int] = {} # Track how many utterances per speaker
     for utt in transcript:
         speaker = utt["speaker"]
@@ -153,13 +297,14 @@ def combine_audio(base_dir: str, background_audio_path: str, transcript_path: st
             continue
         
         # Load the VC clip
-        clip = AudioSegment.from_file(vc_path)
-        # Overlay the VC clip onto the background at the correct position
-        final_audio = final_audio.overlay(clip, position=start)
+        clips.append((start, load_wav(vc_path)))
+
+    # Overlay the VC clips onto the background at their positions
+    final_audio = overlay_clips(background, clips)
 
     # Export the final mixed audio to a WAV file
     output_wav = os.path.join(base_dir, "final_mix.wav")
-    final_audio.export(output_wav, format="wav")
+    save_wav(final_audio, output_wav)
     logger.info("Final mix → %s", output_wav)
 
     return output_wav
@@ -0,0 +1,166 @@
+"""
+Persistent Seed-VC worker.
+
+This script runs inside the seed-vc python environment (see SEED_VC_PYTHON_PATH). It imports
+seed-vc's inference module once, keeps the loaded models in memory and serves conversion
+requests read as JSON lines from stdin. Each request holds a batch of jobs, {"jobs": [{"source": ...,
+"target": ..., "output": ..., <inference options>}, ...]}, and is answered with one JSON line on stdout
+holding one result per job: {"results": [{"ok": true}, {"ok": false, "error": "..."}, ...]}.
+Everything seed-vc prints goes to stderr.
+
+Only the standard library is imported here, since the auto_dubbing environment is not installed
+in the seed-vc environment.
+"""
+import os
+import sys
+import json
+import argparse
+import contextlib
+import importlib.util
+import traceback
+
+# Defaults of seed-vc's inference.py command line options
+INFERENCE_DEFAULTS = {
+    "diffusion_steps": 30,
+    "length_adjust": 1.0,
+    "inference_cfg_rate": 0.7,
+    "f0_condition": False,
+    "auto_f0_adjust": False,
+    "semi_tone_shift": 0,
+    "checkpoint": None,
+    "config": None,
+    "fp16": True,
+}
+
+
+class SeedVC:
+    """
+    Wrapper around seed-vc's inference module that loads the models only once.
+    """
+
+    def __init__(self, seed_vc_dir: str = "seed-vc"):
+        """
+        Import seed-vc's inference module and make its model loading cached.
+
+        The module is loaded from 'seed_vc_dir/inference.py' under its own name, so it cannot clash with other
+        modules called 'inference'. seed-vc's folder is only on sys.path, and the environment variables it sets
+        at import (e.g. HF_HUB_CACHE) are only in effect while seed-vc code runs.
+
+        Args:
+            seed_vc_dir (str): Path to the cloned seed-vc repository.
+        """
+        self._dir = os.path.abspath(seed_vc_dir)
+        self._env: dict[str, str] = {}
+
+        env_before = dict(os.environ)
+        with self._seed_vc_context():
+            try:
+                spec = importlib.util.spec_from_file_location(
+                    f"seed_vc_inference_{abs(hash(self._dir)):x}", os.path.join(self._dir, "inference.py")
+                )
+                if spec is None:
+                    raise ImportError(f"No seed-vc inference.py in {self._dir}")
+                inference = importlib.util.module_from_spec(spec)
+                sys.modules[spec.name] = inference
+                try:
+                    spec.loader.exec_module(inference)
+                except BaseException:
+                    del sys.modules[spec.name]
+                    raise
+            finally:
+                # Keep seed-vc's environment changes to itself
+                self._env = {key: value for key, value in os.environ.items() if env_before.get(key) != value}
+                os.environ.clear()
+                os.environ.update(env_before)
+
+        self._inference = inference
+        self._models: dict[tuple, tuple] = {}
+
+        # inference.main() calls load_models() on every conversion; serve it from the cache instead
+        load_models = inference.load_models
+
+        def cached_load_models(args):
+            key = (args.checkpoint, args.config, args.f0_condition)
+            if key not in self._models:
+                self._models[key] = load_models(args)
+            return self._models[key]
+
+        inference.load_models = cached_load_models
+
+    @contextlib.contextmanager
+    def _seed_vc_context(self):
+        """
+        Put seed-vc's folder on sys.path and apply its environment variables for the duration of the block,
+        as its inference code imports modules and reads settings lazily.
+        """
+        sys.path.insert(0, self._dir)
+        env_before = {key: os.environ.get(key) for key in self._env}
+        os.environ.update(self._env)
+        try:
+            yield
+        finally:
+            for key, value in env_before.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+            with contextlib.suppress(ValueError):
+                sys.path.remove(self._dir)
+
+    def convert(self, source: str, target: str, output: str, **options):
+        """
+        Convert 'source' to sound like 'target' and write the result to the 'output' directory.
+
+        Args:
+            source (str): Path to the source audio file.
+            target (str): Path to the reference audio file of the target speaker.
+            output (str): Directory where the converted audio will be saved.
+            **options:    Any other seed-vc inference option (e.g. diffusion_steps).
+        """
+        args = argparse.Namespace(**{**INFERENCE_DEFAULTS, **options, "source": source, "target": target, "output": output})
+        with self._seed_vc_context(), contextlib.redirect_stdout(sys.stderr):
+            self._inference.main(args)
+
+    def convert_batch(self, jobs: list[dict]) -> list[dict]:
+        """
+        Run a batch of conversions with the loaded models. A failing job does not stop the batch.
+
+        Args:
+            jobs (list[dict]): Keyword arguments for convert() per job.
+
+        Returns:
+            list[dict]: One {"ok": bool, "error": str} result per job.
+        """
+        results = []
+        for job in jobs:
+            try:
+                self.convert(**job)
+                results.append({"ok": True})
+            except Exception as exc:
+                traceback.print_exc()
+                results.append({"ok": False, "error": f"{type(exc).__name__}: {exc}"})
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve Seed-VC conversions from a warm model.")
+    parser.add_argument("--seed-vc-dir", default="seed-vc", help="Path to the cloned seed-vc repository.")
+    args = parser.parse_args()
+
+    # Keep stdout for replies only
+    replies = sys.stdout
+    sys.stdout = sys.stderr
+
+    vc = SeedVC(args.seed_vc_dir)
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        reply = {"results": vc.convert_batch(request["jobs"])}
+        replies.write(json.dumps(reply) + "\n")
+        replies.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,20 @@
 import os
-import json
 import logging
 import warnings
+from contextlib import nullcontext
+from bisect import bisect_left, bisect_right
+from itertools import accumulate
 from pathlib import Path
 import time
+import torch
 import deepl
 import stable_whisper
 import assemblyai as aai
 
 import whisper
 
+from auto_dubbing.utils import load_json, save_json
+
 # Silence httpx and assemblyai logs
 logging.getLogger("httpx").setLevel(logging.WARNING)
 logging.getLogger("assemblyai").setLevel(logging.WARNING)
@@ -73,14 +78,16 @@ def transcribe(audio_path: Path, output_dir: Path) -> str:
         verbose=None
     )
 
-    # Refine word-level timestamps
-    model.refine(
-        str(audio_path),
-        result,
-        word_level=True,
-        precision=0.15,
-        verbose=None
-    )
+    # Refine word-level timestamps (in half precision when running on GPU)
+    on_cuda = model.device.type == "cuda"
+    with torch.autocast("cuda", dtype=torch.float16) if on_cuda else nullcontext():
+        model.refine(
+            str(audio_path),
+            result,
+            word_level=True,
+            precision=0.15,
+            verbose=None
+        )
 
     # Convert to segment-level transcription
     (
@@ -109,8 +116,7 @@ def transcribe(audio_path: Path, output_dir: Path) -> str:
 
     # Write JSON output to output directory
     output_path = output_dir / "whisper.json"
-    with output_path.open("w", encoding="utf-8") as f:
-        json.dump(transcription, f, ensure_ascii=False, indent=2)
+    save_json(transcription, output_path)
 
     logger.info("Whisper transcription saved to %s", output_path)
     logger.info("Detected language: %s", language_code)
@@ -150,77 +156,105 @@ def speaker_diarization(audio_file: str, auth_key: str, output_dir: str) -> tupl
 
     # Save the speaker diarization JSON
     diarization_path = os.path.join(output_dir, "diarization.json")
-    with open(diarization_path, "w", encoding="utf-8") as f:
-        json.dump(utterance_data, f, ensure_ascii=False, indent=2)
+    save_json(utterance_data, diarization_path)
 
     logger.info("Saved diarization to %s", diarization_path)
 
     return str(diarization_path)
 
 
-def align_speaker_labels(whisper_path: str, diarization_path: str, output_dir: str) -> str:
+def align_and_merge(whisper_segments: list[dict], diarization_segments: list[dict], max_gap: float = 0.45) -> list[dict]:
     """
-    Merge Whisper transcription with AssemblyAI speaker labels using timestamp overlap.
+    Assign AssemblyAI speaker labels to Whisper segments using timestamp overlap, and merge
+    consecutive segments of the same speaker in the same pass.
     Discards any Whisper segments that do not overlap with diarized speaker segments.
 
     Args:
-        whisper_path (str): Path to whisper.json.
-        diarization_path (str): Path to diarization.json.
-        output_dir (str): Directory to save final 'transcript.json'.
+        whisper_segments (list[dict]):     Whisper segments with 'start', 'end' and 'text' fields.
+        diarization_segments (list[dict]): Diarization segments with 'Start', 'End' and 'Speaker' fields.
+        max_gap (float):                   Maximum allowed gap (in seconds) between segments with the same speaker to be merged.
 
     Returns:
-        str: Path to the final transcript JSON file.
+        list[dict]: The aligned and merged transcript.
     """
-    logger.info("Loading Whisper segments from %s", whisper_path)
-    with open(whisper_path, "r", encoding="utf-8") as f:
-        whisper_segments = json.load(f)
-
-    logger.info("Loading diarization segments from %s", diarization_path)
-    with open(diarization_path, "r", encoding="utf-8") as f:
-        diarization_segments = json.load(f)
-
-    # Initialise output files
-    aligned = []
+    # Sort diarization segments by start time and keep a running maximum of their end times,
+    # so the candidates overlapping a Whisper segment can be found by bisection
+    a_segs = sorted(diarization_segments, key=lambda a: a["Start"])
+    a_starts = [a["Start"] for a in a_segs]
+    a_max_ends = list(accumulate((a["End"] for a in a_segs), max))
+
+    # Initialise output
+    merged = []
     discarded = 0
 
-    # Iterate over all Whisper segments with their index
-    for w_index, w_seg in enumerate(whisper_segments):
+    for w_seg in whisper_segments:
         # Get start and end time for the current Whisper segment
         w_start, w_end = w_seg["start"], w_seg["end"]
         max_overlap = 0
-        best_speaker = None
         best_a_seg = None
 
-         # Iterate over all diarization segments to find the one with the largest overlap
-        for a_seg in diarization_segments:
-            a_start, a_end = a_seg["Start"], a_seg["End"]
-            overlap = max(0, min(w_end, a_end) - max(w_start, a_start))
+        # Only diarization segments in [lo, hi) can overlap the Whisper segment
+        lo = bisect_right(a_max_ends, w_start)
+        hi = bisect_left(a_starts, w_end)
+        for a_seg in a_segs[lo:hi]:
+            overlap = min(w_end, a_seg["End"]) - max(w_start, a_seg["Start"])
             if overlap > max_overlap:
                 max_overlap = overlap
-                best_speaker = a_seg["Speaker"]
                 best_a_seg = a_seg
 
-        # If a matching speaker segment was found
-        if best_speaker and best_a_seg:
-            true_start = best_a_seg["Start"] if len(aligned) == 0 else w_start
-            # Add the aligned segment to the result list
-            aligned.append({
-                "start": true_start,
-                "end": w_end,
-                "speaker": best_speaker,
-                "text": w_seg["text"]
-            })
-        else:
-            # If no overlap was found, count the segment as discarded
+        # If no overlap was found, count the segment as discarded
+        if best_a_seg is None:
             discarded += 1
+            continue
+
+        curr = {
+            "start": best_a_seg["Start"] if not merged else w_start,
+            "end": w_end,
+            "speaker": best_a_seg["Speaker"],
+            "text": w_seg["text"]
+        }
+
+        # Merge into the previous segment if the speaker is the same and the gap is small
+        prev = merged[-1] if merged else None
+        if prev and prev["speaker"] == curr["speaker"] and curr["start"] - prev["end"] < max_gap:
+            prev["end"] = curr["end"]
+            prev["text"] = prev["text"].rstrip() + " " + curr["text"].lstrip()
+        else:
+            merged.append(curr)
+
+    logger.info("Discarded %d non-overlapping Whisper segments", discarded)
+    return merged
+
+
+def align_speaker_labels(whisper_path: str, diarization_path: str, output_dir: str, max_gap: float = 0.45) -> str:
+    """
+    Merge Whisper transcription with AssemblyAI speaker labels using timestamp overlap, and merge
+    segments close to each other with the same speaker. Writes the result to 'transcript_con.json'.
+
+    Args:
+        whisper_path (str):     Path to whisper.json.
+        diarization_path (str): Path to diarization.json.
+        output_dir (str):       Directory to save final 'transcript_con.json'.
+        max_gap (float):        Maximum allowed gap (in seconds) between segments with the same speaker to be merged.
+
+    Returns:
+        str: Path to the final transcript JSON file.
+    """
+    logger.info("Loading Whisper segments from %s", whisper_path)
+    whisper_segments = load_json(whisper_path)
+
+    logger.info("Loading diarization segments from %s", diarization_path)
+    diarization_segments = load_json(diarization_path)
+
+    transcript = align_and_merge(whisper_segments, diarization_segments, max_gap=max_gap)
 
     # Save the final transcript
-    transcript_path = Path(output_dir) / "transcript.json"
-    with transcript_path.open("w", encoding="utf-8") as f:
-        json.dump(aligned, f, ensure_ascii=False, indent=2)
+    transcript_path = Path(output_dir) / "transcript_con.json"
+    save_json(transcript, transcript_path)
 
     logger.info("Final transcript saved to %s", transcript_path)
-    logger.info("Discarded %d non-overlapping Whisper segments", discarded)
+
+    return str(transcript_path)
 
 
 def translate(transcript_path: str, source_language: str, target_language: str, auth_key: str) -> None:
@@ -234,20 +268,37 @@ def translate(transcript_path: str, source_language: str, target_language: str,
         target_language (str):    DeepL target language code (e.g. "DK").
         auth_key (str):           DeepL API authentication key.
     """
+    # Load the transcript JSON
+    transcript = load_json(transcript_path)
+
+    # Nothing to translate if the source and target languages are the same (e.g. "EN" → "EN-US")
+    if source_language.upper() == target_language.upper().split("-")[0]:
+        logger.info("Source and target language are both %s, skipping translation", source_language)
+        for utterance in transcript:
+            utterance["translation"] = utterance.get("text", "")
+        save_json(transcript, transcript_path)
+        return
+
     logger.info("Translating %s from %s → %s via DeepL", transcript_path, source_language, target_language)
-    # Setup DeepL translator    
+    # Setup DeepL translator
     translator = deepl.Translator(auth_key)
-    
-    # Load the transcript JSON
-    with open(transcript_path, "r", encoding="utf-8") as f:
-        transcript = json.load(f)
-    
+
+    # Cache of already translated texts, so repeated phrases only hit DeepL once
+    cache: dict[tuple[str, str, str], str] = {}
+    cache_hits = 0
+
     # Translate each utterance with exponential backoff
     for utterance in transcript:
         text = utterance.get("text", "")
         if not text:
             continue
 
+        key = (source_language, target_language, text)
+        if key in cache:
+            utterance["translation"] = cache[key]
+            cache_hits += 1
+            continue
+
         max_retries = 5
         delay = 1  # delay in seconds
 
@@ -255,6 +306,7 @@ def translate(transcript_path: str, source_language: str, target_language: str,
             try:
                 translation = translator.translate_text(text, source_lang=source_language, target_lang=target_language)
                 utterance["translation"] = translation.text
+                cache[key] = translation.text
                 break  # successful translation, exit retry loop
             except deepl.exceptions.TooManyRequestsException as e:
                 logger.warning("Rate limit hit: %s. Retrying in %s seconds...", e, delay)
@@ -268,54 +320,11 @@ def translate(transcript_path: str, source_language: str, target_language: str,
             utterance["translation"] = ""  # or handle as needed
 
     # Write the updated utterances back to the JSON file
-    with open(transcript_path, "w", encoding="utf-8") as f:
-        json.dump(transcript, f, ensure_ascii=False, indent=2)
-    
-    logger.info("Updated transcription with translations at %s", transcript_path)
-    
-
-def merge_segments(base_dir, max_gap=0.45):
-    """
-    Merge segments close to each other with same speaker in a transcript from a JSON file.
-    Writes output transcript to a new JSON file ("transcript_con.json") 
-
-    Args:
-        base_dir (Path):    Path to base directory of video (data/processed/video_x) containing 'transcript.json'..
-        max_gap (float):    Maximum allowed gap (in seconds) between segments with the same speaker to be merged.
-    
-    Returns:
-        str: Path to the final transcript JSON file.
-    """
-
-    # Define input- and output paths
-    input_path = os.path.join(base_dir, "transcript.json")
-    output_path = os.path.join(base_dir, "transcript_con.json")
-
-    with open(input_path, "r", encoding="utf-8") as f:
-        segments = json.load(f)
+    save_json(transcript, transcript_path)
 
-    # Initialise merging
-    merged_segments = []
-    prev = segments[0]
-
-    # Go through and merge segments
-    for curr in segments[1:]:
-        time_gap = curr["start"] - prev["end"]
-        if curr["speaker"] == prev["speaker"] and time_gap < max_gap:
-            # Merge current segment into previous
-            prev["end"] = curr["end"]
-            prev["text"] = prev["text"].rstrip() + " " + curr["text"].lstrip()
-        else:
-            merged_segments.append(prev)
-            prev = curr
-    merged_segments.append(prev)  # Don't forget the last one
-
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(merged_segments, f, indent=2, ensure_ascii=False)
-
-    logger.info(f"Merged transcript written to {output_path}")
+    logger.info("Reused cached translations for %d utterances", cache_hits)
+    logger.info("Updated transcription with translations at %s", transcript_path)
 
-    return str(output_path)
 
 # main function to test speaker diarization
 def main():
@@ -1,20 +1,111 @@
 import os
+import re
 import json
+import contextlib
+import queue
+import hashlib
 import logging
+import mmap
 import shutil
+import struct
 import subprocess
+import sys
 import tempfile
+import threading
+import wave
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from io import BytesIO
-from google.cloud import texttospeech
+from xml.sax.saxutils import escape
+import numpy as np
+import soundfile as sf
+from google.api_core.exceptions import InvalidArgument
+from google.cloud import texttospeech, texttospeech_v1beta1
 from pydub import AudioSegment
 from dotenv import load_dotenv
-from audiostretchy.stretch import stretch_audio
+from audiostretchy.stretch import AudioStretch
+
+from auto_dubbing.seed_vc_worker import SeedVC
+from auto_dubbing.utils import load_json, load_transcript, load_wav, save_json, save_wav
+from auto_dubbing.wsola import wsola
 
 logger = logging.getLogger(__name__)
 
+# Script run with the seed-vc python environment to serve conversions from a warm model
+SEED_VC_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "seed_vc_worker.py")
+
+# File in each speaker's tts_vc folder listing the clips copied through without voice conversion
+UNCONVERTED_VC_LIST = "unconverted.json"
+
+# Diffusion steps per Seed-VC conversion; more steps cost proportionally more GPU time for little audible gain
+SEED_VC_DIFFUSION_STEPS = 25
+
+# Sample rate requested from Google TTS (LINEAR16)
+TTS_SAMPLE_RATE = 24000
+
+# Location of the TTS cache used by run.py when paths.tts_cache_folder is not set; tts() only caches when given a folder
+TTS_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "auto_dubbing", "tts")
+
+# Texts longer than this (in characters) are synthesized in sentence-aligned parts
+TTS_MAX_CHARS = 300
+# Pause inserted between the parts of a split text, in milliseconds
+TTS_PART_GAP_MS = 50
+
+# Maximum size (in bytes) of the SSML input of one batched TTS request
+SSML_MAX_CHARS = 5000
+
+# Shared Google TTS client, created on first use so the gRPC channel is reused across calls
+_CLIENT: texttospeech.TextToSpeechClient | None = None
+# Shared v1beta1 client, used for batched SSML requests (time pointing is only available in v1beta1)
+_BETA_CLIENT: texttospeech_v1beta1.TextToSpeechClient | None = None
+# Guards the creation of the shared clients, which may first be requested from several TTS threads at once
+_CLIENT_LOCK = threading.Lock()
+# Voices whose streaming synthesis was rejected, so their remaining texts go straight to synthesize_speech
+_NO_STREAMING_VOICES: set[str] = set()
+
+# Shared in-process Seed-VC (False once it turned out not to be loadable), see _get_in_process_vc()
+_IN_PROCESS_VC = None
+
+
+def _get_client() -> texttospeech.TextToSpeechClient:
+    """
+    Return the shared Google Cloud Text-to-Speech client, creating it on first use.
+
+    Returns:
+        texttospeech.TextToSpeechClient: The shared client.
+    """
+    global _CLIENT
+    if _CLIENT is None:
+        with _CLIENT_LOCK:
+            if _CLIENT is None:
+                # Check if google credentials are set
+                creds = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
+                if not creds or not os.path.isfile(creds):
+                    raise RuntimeError("GOOGLE_APPLICATION_CREDENTIALS must point to your GCP JSON key")
+                _CLIENT = texttospeech.TextToSpeechClient()
+    return _CLIENT
+
+
+def _get_beta_client() -> texttospeech_v1beta1.TextToSpeechClient:
+    """
+    Return the shared Google Cloud Text-to-Speech v1beta1 client, creating it on first use.
+
+    Returns:
+        texttospeech_v1beta1.TextToSpeechClient: The shared client.
+    """
+    global _BETA_CLIENT
+    if _BETA_CLIENT is None:
+        _get_client()  # Check credentials
+        with _CLIENT_LOCK:
+            if _BETA_CLIENT is None:
+                _BETA_CLIENT = texttospeech_v1beta1.TextToSpeechClient()
+    return _BETA_CLIENT
+
+
 def trim_vc_start(base_dir: str, frames_to_trim: int = 3, fps: int = 30):
     """
     Trim the first few frames (converted to milliseconds) from the start of each voice-converted (VC) utterance WAV file to remove potential noise.
+    Clips that were copied through without conversion (listed in 'tts_vc/unconverted.json') are left untouched.
 
     Args:
         base_dir (str): Path to the root directory containing 'speaker_audio/*/tts_vc' folders.
@@ -26,20 +117,29 @@ def trim_vc_start(base_dir: str, frames_to_trim: int = 3, fps: int = 30):
     logger.info("Trimming %dms (%d frames at %dfps) from VC utterance starts", trim_ms, frames_to_trim, fps)
 
     # Go through all speakers
-    speaker_dir = os.path.join(base_dir, "speaker_audio")
-    for speaker in os.listdir(speaker_dir):
-        vc_dir = os.path.join(speaker_dir, speaker, "tts_vc")
+    for _, spk_dir in _speaker_dirs(os.path.join(base_dir, "speaker_audio")):
+        vc_dir = os.path.join(spk_dir, "tts_vc")
         if not os.path.isdir(vc_dir):
             continue
 
+        # Clips that never went through Seed-VC have no VC onset noise to trim
+        unconverted_path = os.path.join(vc_dir, UNCONVERTED_VC_LIST)
+        unconverted = set(load_json(unconverted_path)) if os.path.exists(unconverted_path) else set()
+
         # Go through and trim alle VC audiofiles
-        for fname in os.listdir(vc_dir):
-            if not fname.endswith(".wav"):
-                continue
-            path = os.path.join(vc_dir, fname)
-            audio = AudioSegment.from_file(path)
-            trimmed = audio[trim_ms:]
-            trimmed.export(path, format="wav")
+        with os.scandir(vc_dir) as it:
+            paths = [
+                entry.path for entry in it
+                if entry.name.endswith(".wav") and entry.name not in unconverted and entry.is_file()
+            ]
+        for path in paths:
+
+            # Read only the samples after the trimmed start and rewrite them, keeping the file's sample format
+            info = sf.info(path)
+            dtype = "int16" if info.subtype == "PCM_16" else "float32"
+            start = min(trim_ms * info.samplerate // 1000, info.frames)
+            samples, sample_rate = sf.read(path, start=start, dtype=dtype, always_2d=True)
+            sf.write(path, samples, sample_rate, subtype=info.subtype, format="WAV")
             logger.debug("Trimmed start of VC clip: %s", path)
 
     logger.info("VC start trimming complete.")
@@ -56,25 +156,339 @@ def trim_trailing_silence(audio: AudioSegment, silence_thresh: int = -40, chunk_
     Returns:
         AudioSegment: The trimmed audio segment with trailing silence removed.
     """
-    # Initialize trim counter
-    trim_ms = 0
-    
-    # Scan audio from the end in chunks
-    while trim_ms < len(audio):
-        chunk = audio[-(trim_ms + chunk_size): -trim_ms if trim_ms > 0 else None]
-        if chunk.dBFS > silence_thresh:
-            break
-        trim_ms += chunk_size
-
+    # Per-frame energy (summed over channels)
+    samples = np.asarray(audio.get_array_of_samples(), dtype=np.float64).reshape(-1, audio.channels)
+    energy = (samples ** 2).sum(axis=1)
+
+    # Split into chunks aligned to the end of the audio; the first chunk may be partial
+    chunk_frames = max(1, int(audio.frame_rate * chunk_size / 1000))
+    n_chunks = -(-len(energy) // chunk_frames)
+    pad = n_chunks * chunk_frames - len(energy)
+    chunk_energy = np.concatenate([np.zeros(pad), energy]).reshape(n_chunks, chunk_frames).sum(axis=1)
+    chunk_len = np.full(n_chunks, chunk_frames * audio.channels)
+    if n_chunks:
+        chunk_len[0] -= pad * audio.channels
+
+    # A chunk is loud if its RMS (truncated like pydub's) exceeds the threshold converted from dBFS to amplitude
+    thresh_amp = 10 ** (silence_thresh / 20) * audio.max_possible_amplitude
+    rms = np.floor(np.sqrt(chunk_energy / chunk_len))
+    loud = np.flatnonzero(rms > thresh_amp)
+    if len(loud) == 0:
+        return audio[:0]
+
+    # Number of silent chunks after the last loud one
+    trim_ms = (n_chunks - 1 - loud[-1]) * chunk_size
     if trim_ms == 0:
         return audio
     return audio[:-trim_ms]
 
 
-def tts(transcript_path: str, output_dir: str, language_code: str = "da-DK",voice_name: str = "da-DK-Neural2-D", gender: texttospeech.SsmlVoiceGender = texttospeech.SsmlVoiceGender.FEMALE):
+def _link_or_copy(src: str, dst: str):
+    """
+    Hardlink 'src' to 'dst' (replacing 'dst' if it exists), falling back to a copy across filesystems.
+    The existing 'dst' is replaced, never written to, so files it may be hardlinked to stay untouched.
+
+    Args:
+        src (str): Existing file.
+        dst (str): Path of the link or copy.
+    """
+    tmp = f"{dst}.{threading.get_ident()}.tmp"
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dst)
+
+
+def _tts_cache_path(cache_dir: str, text: str, voice: texttospeech.VoiceSelectionParams, mode: str) -> str:
+    """
+    Path of the cached synthesis of 'text' with 'voice', keyed by a SHA-256 hash of the voice settings, synthesis
+    mode and text. The mode is part of the key, as the same text sounds different when synthesized alone, streamed
+    or cut out of a batched SSML request.
+
+    Args:
+        cache_dir (str):                           Root directory of the TTS cache.
+        text (str):                                Text to synthesize.
+        voice (texttospeech.VoiceSelectionParams): Voice to synthesize with.
+        mode (str):                                How the audio is synthesized: "speech", "streaming" or "ssml_batch".
+
+    Returns:
+        str: Path of the cached WAV file (which may not exist yet).
+    """
+    gender = texttospeech.SsmlVoiceGender(voice.ssml_gender).name
+    key = f"{voice.name}|{voice.language_code}|{gender}|{TTS_SAMPLE_RATE}|{mode}|{text}"
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, digest[:2], f"{digest}.wav")
+
+
+def _synthesize_utterance(client: texttospeech.TextToSpeechClient, voice: texttospeech.VoiceSelectionParams,
+                          audio_config: texttospeech.AudioConfig, text: str, out_path: str,
+                          cache_dir: str | None = None, streaming: bool = False) -> str:
+    """
+    Synthesize a single utterance with Google Cloud Text-to-Speech and write it to a WAV file.
+    If a cache directory is given, previously synthesized texts are linked from the cache instead.
+
+    Args:
+        client (texttospeech.TextToSpeechClient): Shared TTS client.
+        voice (texttospeech.VoiceSelectionParams): Voice to synthesize with.
+        audio_config (texttospeech.AudioConfig):   Audio encoding requested from Google.
+        text (str):                                Text to synthesize.
+        out_path (str):                            Path of the WAV file to write.
+        cache_dir (str | None):                    Root directory of the TTS cache (disabled if None).
+        streaming (bool):                          Use the streaming synthesis API (Chirp 3 HD voices only). Once a voice
+                                                   rejects it, its later texts use synthesize_speech.
+
+    Returns:
+        str: Path to the written WAV file.
+    """
+    streaming = streaming and voice.name not in _NO_STREAMING_VOICES
+    mode = "streaming" if streaming else "speech"
+    cache_path = _tts_cache_path(cache_dir, text, voice, mode) if cache_dir else None
+    if cache_path and os.path.isfile(cache_path):
+        _link_or_copy(cache_path, out_path)
+        return out_path
+
+    # Synthesize long texts in sentence-aligned parts, joined with a short pause
+    parts = []
+    for part in _split_text(text, TTS_MAX_CHARS):
+        if streaming:
+            try:
+                parts.append(_synthesize_streaming(client, voice, part))
+                continue
+            except InvalidArgument as e:
+                # The voice does not support streaming; use regular requests for this and every later part and
+                # utterance of the voice, and keep the result out of the streaming cache entry
+                logger.warning("Streaming synthesis failed for %s (%s), falling back to synthesize_speech", voice.name, e)
+                _NO_STREAMING_VOICES.add(voice.name)
+                streaming = False
+                cache_path = None
+
+        input_msg = texttospeech.SynthesisInput(text=part)
+        response = client.synthesize_speech(
+            request={"input": input_msg, "voice": voice, "audio_config": audio_config}
+        )
+        # LINEAR16 responses are complete WAV files, so the PCM frames are read directly without an MP3 decode
+        with wave.open(BytesIO(response.audio_content), "rb") as wf:
+            parts.append(AudioSegment(
+                data=wf.readframes(wf.getnframes()),
+                sample_width=wf.getsampwidth(),
+                frame_rate=wf.getframerate(),
+                channels=wf.getnchannels(),
+            ))
+
+    audio_seg = parts[0]
+    if len(parts) > 1:
+        # Zero-filled LINEAR16 frames between the parts, whose own trailing silence is trimmed first
+        gap = bytes(audio_seg.frame_rate * TTS_PART_GAP_MS // 1000 * audio_seg.frame_width)
+        frames = gap.join(trim_trailing_silence(part, silence_thresh=-40).raw_data for part in parts)
+        audio_seg = AudioSegment(
+            data=frames,
+            sample_width=audio_seg.sample_width,
+            frame_rate=audio_seg.frame_rate,
+            channels=audio_seg.channels,
+        )
+    return _write_tts_output(audio_seg, out_path, cache_path)
+
+
+def _synthesize_streaming(client: texttospeech.TextToSpeechClient, voice: texttospeech.VoiceSelectionParams,
+                          text: str) -> AudioSegment:
+    """
+    Synthesize a text over the bidirectional streaming API, which starts returning audio sooner than
+    synthesize_speech. Only Chirp 3 HD voices support streaming, and it does not accept SSML.
+
+    Args:
+        client (texttospeech.TextToSpeechClient): Shared TTS client.
+        voice (texttospeech.VoiceSelectionParams): Voice to synthesize with.
+        text (str):                                Text to synthesize.
+
+    Returns:
+        AudioSegment: The synthesized audio (16-bit mono PCM at TTS_SAMPLE_RATE).
+    """
+    config = texttospeech.StreamingSynthesizeConfig(
+        voice=voice,
+        streaming_audio_config=texttospeech.StreamingAudioConfig(
+            audio_encoding=texttospeech.AudioEncoding.PCM,
+            sample_rate_hertz=TTS_SAMPLE_RATE,
+        ),
+    )
+    requests = [
+        texttospeech.StreamingSynthesizeRequest(streaming_config=config),
+        texttospeech.StreamingSynthesizeRequest(input=texttospeech.StreamingSynthesisInput(text=text)),
+    ]
+
+    # The responses carry raw PCM chunks without WAV headers
+    frames = b"".join(response.audio_content for response in client.streaming_synthesize(iter(requests)))
+    return AudioSegment(data=frames, sample_width=2, frame_rate=TTS_SAMPLE_RATE, channels=1)
+
+
+def _split_text(text: str, max_chars: int) -> list[str]:
+    """
+    Split a text at sentence boundaries into parts of at most 'max_chars' characters, merging
+    consecutive sentences greedily. Sentences longer than 'max_chars' are kept whole.
+
+    Args:
+        text (str):      Text to split.
+        max_chars (int): Maximum length of a part.
+
+    Returns:
+        list[str]: The parts, in order (the text itself if it is short enough).
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    parts: list[str] = []
+    for sentence in re.split(r"(?<=[.!?])\s+", text.strip()):
+        if parts and len(parts[-1]) + 1 + len(sentence) <= max_chars:
+            parts[-1] = f"{parts[-1]} {sentence}"
+        else:
+            parts.append(sentence)
+    return parts
+
+
+def _write_tts_output(audio_seg: AudioSegment, out_path: str, cache_path: str | None = None) -> str:
+    """
+    Trim trailing silence from a synthesized utterance and write it to 'out_path', through the cache if enabled.
+
+    Args:
+        audio_seg (AudioSegment): Synthesized utterance.
+        out_path (str):           Path of the WAV file to write.
+        cache_path (str | None):  Path of the utterance in the TTS cache (disabled if None).
+
+    Returns:
+        str: Path to the written WAV file.
+    """
+    audio_seg = trim_trailing_silence(audio_seg, silence_thresh=-40)
+
+    # Write to a temporary file first, so an existing output (which may be linked to the cache) is replaced, not overwritten
+    target = cache_path or out_path
+    if cache_path:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp = f"{target}.{threading.get_ident()}.tmp"
+    save_wav(audio_seg, tmp)
+    os.replace(tmp, target)
+    if cache_path:
+        _link_or_copy(cache_path, out_path)
+    return out_path
+
+
+def _synthesize_batch(client: texttospeech.TextToSpeechClient, voice: texttospeech.VoiceSelectionParams,
+                      audio_config: texttospeech.AudioConfig, batch: list[tuple[str, str]],
+                      cache_dir: str | None = None) -> list[str]:
+    """
+    Synthesize several utterances with one Google Cloud Text-to-Speech request. The texts are joined into one
+    SSML input with a <mark> before each of them, and the returned audio is split at the mark timepoints.
+    Falls back to one request per utterance if the response does not hold all timepoints.
+
+    Args:
+        client (texttospeech.TextToSpeechClient): Shared TTS client (used for the fallback).
+        voice (texttospeech.VoiceSelectionParams): Voice to synthesize with.
+        audio_config (texttospeech.AudioConfig):   Audio encoding requested from Google.
+        batch (list[tuple[str, str]]):             (text, out_path) of each utterance.
+        cache_dir (str | None):                    Root directory of the TTS cache (disabled if None).
+
+    Returns:
+        list[str]: Paths to the written WAV files.
+    """
+    # Link cached utterances and only synthesize the rest
+    outputs = []
+    pending = []
+    for text, out_path in batch:
+        cache_path = _tts_cache_path(cache_dir, text, voice, "ssml_batch") if cache_dir else None
+        if cache_path and os.path.isfile(cache_path):
+            _link_or_copy(cache_path, out_path)
+            outputs.append(out_path)
+        else:
+            pending.append((text, out_path, cache_path))
+    if not pending:
+        return outputs
+
+    # Time pointing is only available in the v1beta1 API
+    ssml = _batch_ssml([text for text, _, _ in pending])
+    request = texttospeech_v1beta1.SynthesizeSpeechRequest(
+        input=texttospeech_v1beta1.SynthesisInput(ssml=ssml),
+        voice=texttospeech_v1beta1.VoiceSelectionParams.deserialize(type(voice).serialize(voice)),
+        audio_config=texttospeech_v1beta1.AudioConfig.deserialize(type(audio_config).serialize(audio_config)),
+        enable_time_pointing=[texttospeech_v1beta1.SynthesizeSpeechRequest.TimepointType.SSML_MARK],
+    )
+    response = _get_beta_client().synthesize_speech(request=request)
+
+    marks = {tp.mark_name: tp.time_seconds for tp in response.timepoints}
+    if any(f"u{i}" not in marks for i in range(len(pending))):
+        logger.warning("TTS response is missing mark timepoints, synthesizing %d utterances one by one", len(pending))
+        return outputs + [
+            _synthesize_utterance(client, voice, audio_config, text, out_path, cache_dir)
+            for text, out_path, _ in pending
+        ]
+
+    with wave.open(BytesIO(response.audio_content), "rb") as wf:
+        frame_rate = wf.getframerate()
+        frame_width = wf.getsampwidth() * wf.getnchannels()
+        data = wf.readframes(wf.getnframes())
+        sample_width, channels = wf.getsampwidth(), wf.getnchannels()
+
+    # Cut the audio between consecutive marks; the last utterance ends at the closing mark
+    bounds = [round(marks[f"u{i}"] * frame_rate) * frame_width for i in range(len(pending))]
+    bounds.append(round(marks["end"] * frame_rate) * frame_width if "end" in marks else len(data))
+    for i, (_, out_path, cache_path) in enumerate(pending):
+        audio_seg = AudioSegment(
+            data=data[bounds[i]:max(bounds[i], bounds[i + 1])],
+            sample_width=sample_width,
+            frame_rate=frame_rate,
+            channels=channels,
+        )
+        outputs.append(_write_tts_output(audio_seg, out_path, cache_path))
+    return outputs
+
+
+def _batch_ssml(texts: list[str]) -> str:
+    """
+    Join texts into one SSML document with a <mark name="u{i}"/> before each text and a closing <mark name="end"/>.
+
+    Args:
+        texts (list[str]): Texts to join.
+
+    Returns:
+        str: The SSML document.
+    """
+    body = "".join(f'<mark name="u{i}"/>{escape(text)}' for i, text in enumerate(texts))
+    return f'<speak>{body}<mark name="end"/></speak>'
+
+
+def _ssml_batches(tasks: list[tuple[str, str]], max_chars: int = SSML_MAX_CHARS) -> list[list[tuple[str, str]]]:
+    """
+    Group consecutive (text, out_path) tasks into batches whose SSML stays below Google's input limit.
+
+    Args:
+        tasks (list[tuple[str, str]]): (text, out_path) of each utterance, in order.
+        max_chars (int):               Maximum length of the SSML of a batch.
+
+    Returns:
+        list[list[tuple[str, str]]]: The batches.
+    """
+    batches: list[list[tuple[str, str]]] = []
+    batch: list[tuple[str, str]] = []
+    size = len(_batch_ssml([]))
+    for text, out_path in tasks:
+        # Size of the mark and the escaped text this task adds to the SSML
+        task_size = len(f'<mark name="u{len(batch)}"/>{escape(text)}'.encode("utf-8"))
+        if batch and size + task_size > max_chars:
+            batches.append(batch)
+            batch = []
+            size = len(_batch_ssml([]))
+            task_size = len(f'<mark name="u0"/>{escape(text)}'.encode("utf-8"))
+        batch.append((text, out_path))
+        size += task_size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def tts(transcript_path: str, output_dir: str, language_code: str = "da-DK",voice_name: str = "da-DK-Neural2-D", gender: texttospeech.SsmlVoiceGender = texttospeech.SsmlVoiceGender.FEMALE, max_workers: int = 16, cache_dir: str | None = None, batch_ssml: bool = False, streaming: bool | None = None):
     """
     Read a transcription JSON and synthesize each utterance to a WAV file using Google Cloud Text-to-Speech.
     Each utterance must have a "translation" field. Output WAV files are organized by speaker in subfolders.
+    Requests are sent concurrently from a thread pool sharing one TTS client. Each distinct text is synthesized
+    once per run, and with a cache directory, texts synthesized before with the same voice are taken from it.
 
     Args:
     transcript_path (str): Path to the transcription JSON file (each utterance must have a "translation" field).
@@ -82,99 +496,247 @@ def tts(transcript_path: str, output_dir: str, language_code: str = "da-DK",voic
     language_code (str):   Language code for TTS (defaults to Danish, "da-DK").
     voice_name (str):      Specific Google voice name.
     gender (texttospeech.SsmlVoiceGender): SSML gender selection.
+    max_workers (int):     Maximum number of concurrent TTS requests.
+    cache_dir (str | None): Root directory of the TTS cache, shared across runs (disabled by default; see TTS_CACHE_DIR).
+    batch_ssml (bool):     Synthesize the utterances of each speaker in batched SSML requests, split at <mark> timepoints.
+    streaming (bool | None): Use the low-latency streaming synthesis API (Chirp 3 HD voices only, not with batch_ssml).
+                           By default it is used for Chirp 3 HD voices unless batch_ssml is set.
 
     Returns:
         dict: A mapping from each speaker label (e.g. "A") to a list of generated WAV file paths.
     """
+    if batch_ssml and streaming:
+        raise ValueError("Streaming synthesis does not accept SSML, so batch_ssml and streaming cannot be combined")
+    if streaming is None:
+        streaming = not batch_ssml and "Chirp3-HD" in voice_name
+
     logger.info("Loading transcript from %s", transcript_path)
 
     # Load JSON transcript
-    with open(transcript_path, "r", encoding="utf-8") as f:
-        transcript = json.load(f)
-
-    # Check if google credentials are set
-    creds = os.getenv("GOOGLE_APPLICATION_CREDENTIALS")
-    if not creds or not os.path.isfile(creds):
-        raise RuntimeError("GOOGLE_APPLICATION_CREDENTIALS must point to your GCP JSON key")
-    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = creds
+    transcript, by_speaker = load_transcript(transcript_path)
 
     # Setup TTS client and voice
-    client = texttospeech.TextToSpeechClient()
+    client = _get_client()
     voice = texttospeech.VoiceSelectionParams(
         language_code=language_code,
         name=voice_name,
         ssml_gender=gender,
     )
-    audio_config = texttospeech.AudioConfig(audio_encoding=texttospeech.AudioEncoding.MP3)
+    audio_config = texttospeech.AudioConfig(
+        audio_encoding=texttospeech.AudioEncoding.LINEAR16,
+        sample_rate_hertz=TTS_SAMPLE_RATE,
+    )
 
-    # Synthesize per utterance
-    speaker_counts: dict[str, int] = {}
+    # Assign each utterance its per-speaker index up front, so file names do not depend on completion order.
+    # Repeated texts are only synthesized for their first utterance and linked to the others afterwards
+    speaker_outputs: dict[str, list[str]] = {}
+    speaker_tasks: dict[str, list[tuple[str, str]]] = {}
+    first_outputs: dict[str, str] = {}
+    duplicates: list[tuple[str, str]] = []
+
+    for speaker_id, utts in by_speaker.items():
+        speaker_dir = os.path.join(output_dir, "speaker_audio", f"speaker_{speaker_id}", "tts")
+        os.makedirs(speaker_dir, exist_ok=True)
+
+        for idx, utterance in enumerate(utts, start=1):
+            filename = f"{speaker_id}_utt_{idx:02d}.wav"
+            out_path = os.path.join(speaker_dir, filename)
+
+            text = utterance["translation"]
+            speaker_outputs.setdefault(speaker_id, []).append(out_path)
+            if text in first_outputs:
+                duplicates.append((first_outputs[text], out_path))
+            else:
+                first_outputs[text] = out_path
+                speaker_tasks.setdefault(speaker_id, []).append((text, out_path))
 
     logger.info("Starting TTS synthesis for %d utterances", len(transcript))
 
-    for utterance in transcript:
-        speaker_id = utterance["speaker"]
-        text = utterance["translation"]
+    # Synthesize, decode and export concurrently
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        if batch_ssml:
+            futures = [
+                executor.submit(_synthesize_batch, client, voice, audio_config, batch, cache_dir)
+                for spk_tasks in speaker_tasks.values()
+                for batch in _ssml_batches(spk_tasks)
+            ]
+        else:
+            futures = [
+                executor.submit(_synthesize_utterance, client, voice, audio_config, text, out_path, cache_dir, streaming)
+                for spk_tasks in speaker_tasks.values()
+                for text, out_path in spk_tasks
+            ]
+        for future in as_completed(futures):
+            logger.debug("Synthesized %s", future.result())
 
-        speaker_counts[speaker_id] = speaker_counts.get(speaker_id, 0) + 1
-        idx = speaker_counts[speaker_id]
+    for src, dst in duplicates:
+        _link_or_copy(src, dst)
 
-        # Synthesize
-        input_msg = texttospeech.SynthesisInput(text=text)
-        response = client.synthesize_speech(
-            request={"input": input_msg, "voice": voice, "audio_config": audio_config}
-        )
-        audio_seg = AudioSegment.from_mp3(BytesIO(response.audio_content))
-        audio_seg = trim_trailing_silence(audio_seg, silence_thresh=-40)
+    logger.info("TTS synthesis complete for %d utterances (%d repeated texts reused)", len(transcript), len(duplicates))
+    return speaker_outputs
 
-        # Write out
-        speaker_dir = os.path.join(output_dir, "speaker_audio", f"speaker_{speaker_id}", "tts")
-        os.makedirs(speaker_dir, exist_ok=True)
-        filename = f"{speaker_id}_utt_{idx:02d}.wav"
-        out_path = os.path.join(speaker_dir, filename)
-        audio_seg.export(out_path, format="wav")
 
-    logger.info("TTS synthesis complete for %d utterances", len(transcript))
+def _stretch_audiostretchy(src_path: str, out_path: str, ratio: float):
+    """
+    Time-stretch an audio file with audiostretchy (TDHS) and write the result as a WAV file.
+    The conversion to 16-bit PCM (required by audiostretchy) is done in memory, without a temporary file.
+
+    Args:
+        src_path (str): Path to the input audio file.
+        out_path (str): Path to save the stretched WAV file.
+        ratio (float):  Stretch ratio; values above 1.0 lengthen the audio, values below 1.0 shorten it.
+    """
+    samples, sample_rate = sf.read(src_path, dtype="int16")
+    pcm16 = BytesIO()
+    sf.write(pcm16, samples, sample_rate, format="WAV", subtype="PCM_16")
+    pcm16.seek(0)
+
+    stretcher = AudioStretch()
+    stretcher.open(file=pcm16, format="wav")
+    stretcher.stretch(ratio=ratio)
+    stretcher.save(path=out_path)
+
+
+def _stretch_ffmpeg(src_path: str, out_path: str, ratio: float):
+    """
+    Time-stretch an audio file with ffmpeg's atempo filter (WSOLA) and write the result as a WAV file.
+
+    Args:
+        src_path (str): Path to the input audio file.
+        out_path (str): Path to save the stretched WAV file.
+        ratio (float):  Stretch ratio; values above 1.0 lengthen the audio, values below 1.0 shorten it.
+    """
+    # atempo takes a speed factor in [0.5, 2.0]; chain filters for ratios outside that range
+    tempo = 1.0 / ratio
+    filters = []
+    while tempo > 2.0:
+        filters.append("atempo=2.0")
+        tempo /= 2.0
+    while tempo < 0.5:
+        filters.append("atempo=0.5")
+        tempo /= 0.5
+    filters.append(f"atempo={tempo:.6f}")
+
+    cmd = [
+        "ffmpeg",
+        "-hide_banner",
+        "-loglevel", "error",
+        "-y",
+        "-threads", "1",         # parallelism comes from the process pool
+        "-i", src_path,
+        "-filter:a", ",".join(filters),
+        out_path
+    ]
+    subprocess.run(cmd, check=True)
+
+
+def _stretch_rubberband(src_path: str, out_path: str, ratio: float):
+    """
+    Time-stretch an audio file with the Rubber Band command line tool and write the result as a WAV file.
+
+    Args:
+        src_path (str): Path to the input audio file.
+        out_path (str): Path to save the stretched WAV file.
+        ratio (float):  Stretch ratio; values above 1.0 lengthen the audio, values below 1.0 shorten it.
+    """
+    cmd = ["rubberband", "--quiet", "--no-threads", "-t", f"{ratio:.6f}", src_path, out_path]
+    subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL)
+
+
+def _stretch_wsola(src_path: str, out_path: str, ratio: float):
+    """
+    Time-stretch an audio file in-process with WSOLA and write the result as a 16-bit WAV file.
+
+    Args:
+        src_path (str): Path to the input audio file.
+        out_path (str): Path to save the stretched WAV file.
+        ratio (float):  Stretch ratio; values above 1.0 lengthen the audio, values below 1.0 shorten it.
+    """
+    samples, sample_rate = sf.read(src_path, dtype="float32", always_2d=True)
+    stretched = wsola(samples, sample_rate, ratio)
+    sf.write(out_path, np.clip(stretched, -1.0, 1.0), sample_rate, subtype="PCM_16", format="WAV")
 
 
-def convert_to_pcm16(input_path: str, output_path: str):
+def _stretch_pedalboard(src_path: str, out_path: str, ratio: float):
     """
-    Convert an audio file to 16-bit PCM WAV format using PyDub and ffmpeg.
+    Time-stretch an audio file in-process with pedalboard's Rubber Band bindings and write the result as a 16-bit WAV file.
+    pedalboard is only imported when this backend is used.
 
     Args:
-        input_path (str): Path to the input audio file.
-        output_path (str): Path to save the converted 16-bit PCM WAV file.
+        src_path (str): Path to the input audio file.
+        out_path (str): Path to save the stretched WAV file.
+        ratio (float):  Stretch ratio; values above 1.0 lengthen the audio, values below 1.0 shorten it.
+    """
+    from pedalboard import time_stretch
+
+    samples, sample_rate = sf.read(src_path, dtype="float32", always_2d=True)
+    # pedalboard takes (channels, n_samples) and a speed factor rather than a length ratio
+    stretched = time_stretch(samples.T, sample_rate, stretch_factor=1.0 / ratio, high_quality=True)
+    sf.write(out_path, np.clip(stretched.T, -1.0, 1.0), sample_rate, subtype="PCM_16", format="WAV")
+
+
+# Time-stretch implementations selectable in stretch_to_file()
+STRETCH_BACKENDS = {
+    "ffmpeg": _stretch_ffmpeg,
+    "audiostretchy": _stretch_audiostretchy,
+    "wsola": _stretch_wsola,
+    "rubberband": _stretch_rubberband,
+    "pedalboard": _stretch_pedalboard,
+}
+
+
+def stretch_to_file(src_path: str, out_path: str, ratio: float, backend: str = "ffmpeg"):
+    """
+    Time-stretch an audio file and write the result as a WAV file.
+
+    Args:
+        src_path (str): Path to the input audio file.
+        out_path (str): Path to save the stretched WAV file.
+        ratio (float):  Stretch ratio; values above 1.0 lengthen the audio, values below 1.0 shorten it.
+        backend (str):  Time-stretch implementation, one of STRETCH_BACKENDS.
+    """
+    if backend not in STRETCH_BACKENDS:
+        raise ValueError(f"Unknown stretch backend {backend!r}, expected one of {sorted(STRETCH_BACKENDS)}")
+    STRETCH_BACKENDS[backend](src_path, out_path, ratio)
+
+
+def _stretch_one(task: tuple[str, str, float, str]) -> str:
+    """
+    Process pool worker: time-stretch one VC clip.
+
+    Args:
+        task (tuple[str, str, float, str]): Source path, output path, stretch ratio and backend.
 
     Returns:
-        None
+        str: Path to the stretched WAV file.
     """
-    audio = AudioSegment.from_file(input_path)
-    audio = audio.set_sample_width(2)  # 16-bit
-    audio.export(output_path, format="wav")
+    src_path, out_path, ratio, backend = task
+    stretch_to_file(src_path, out_path, ratio, backend)
+    return out_path
 
 
-def time_stretch_vc(base_dir: str, transcript_path: str):
+def time_stretch_vc(base_dir: str, transcript_path: str, max_workers: int | None = None, backend: str = "ffmpeg"):
     """
     Time stretches each voice converted tts segment to match original duration.
-    The stretch ratio is clamped between [0.75, 1.25].
+    The stretch ratio is clamped between [0.75, 1.25]. Utterances are stretched in parallel in a process pool.
 
     Args:
         base_dir (Path): Path to base directory of video (data/processed/video_x).
         transcript_path (str): Path to the JSON file containing transcript.
+        max_workers (int | None): Number of worker processes (defaults to the number of CPUs).
+        backend (str): Time-stretch implementation, one of STRETCH_BACKENDS ("ffmpeg", "audiostretchy", "wsola", "rubberband" or "pedalboard").
     """
 
-    logger.info("Time-stretching VC utterances")
+    logger.info("Time-stretching VC utterances with %s", backend)
 
-    # Load the transcript JSON file
-    with open(transcript_path, "r", encoding="utf-8") as f:
-        transcript = json.load(f)
+    # Load the transcript JSON file, grouped by speaker
+    _, by_speaker = load_transcript(transcript_path)
 
-    # Group utterances by speaker
-    by_speaker: dict[str, list[dict]] = {}
-    for utterance in transcript:
-        by_speaker.setdefault(utterance["speaker"], []).append(utterance)
+    MIN_RATIO = 0.75
+    MAX_RATIO = 1.25
 
-    # Process each speaker separately
+    # Collect the stretch jobs of all speakers
+    tasks: list[tuple[str, str, float, str]] = []
     for speaker_id, utts in by_speaker.items():
         logger.info("Processing speaker %s (%d utterances)", speaker_id, len(utts))
 
@@ -183,9 +745,6 @@ def time_stretch_vc(base_dir: str, transcript_path: str):
         stretched_dir = os.path.join(base_dir, "speaker_audio", f"speaker_{speaker_id}", "tts_vc_stretched")
         os.makedirs(stretched_dir, exist_ok=True)
 
-        MIN_RATIO = 0.75
-        MAX_RATIO = 1.25
-
         # Process each utterance for this speaker
         for idx, utterance in enumerate(utts, start=1):
             # Calculate the target duration in milliseconds
@@ -197,32 +756,29 @@ def time_stretch_vc(base_dir: str, transcript_path: str):
             if not os.path.exists(src_path):
                 logger.warning("Missing VC file: %s", src_path)
                 continue
-            
-            # Load the original VC audio
-            orig = AudioSegment.from_file(src_path)
-            if len(orig) == 0:
+
+            # Read the duration of the original VC audio from its header
+            orig_ms = round(sf.info(src_path).duration * 1000)
+            if orig_ms == 0:
                 logger.warning("Skipping empty VC file: %s", src_path)
                 continue
 
             # Calculate and clamp the stretch ratio
-            ratio = target_ms / len(orig)
+            ratio = target_ms / orig_ms
             clamped_ratio = max(MIN_RATIO, min(MAX_RATIO, ratio))
 
             # Log if the ratio was clamped
             if clamped_ratio != ratio:
                 logger.warning(
                     "Clamping stretch ratio for %s: %.2f -> %.2f (target=%dms, orig=%dms)",
-                    src_path, ratio, clamped_ratio, target_ms, len(orig)
+                    src_path, ratio, clamped_ratio, target_ms, orig_ms
                 )
 
-            # Convert to PCM16 WAV (required by stretch_audio)
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-                tmp_path = tmp.name
-            convert_to_pcm16(src_path, tmp_path)
-            # Perform time-stretching and export the result
-            stretch_audio(tmp_path, out_path, ratio=clamped_ratio)
-            os.remove(tmp_path)
-            
+            tasks.append((src_path, out_path, clamped_ratio, backend))
+
+    # Perform time-stretching and export the results in parallel
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for out_path in executor.map(_stretch_one, tasks):
             # Check if output was created
             if not os.path.exists(out_path):
                 logger.error("Stretched VC audio not found: %s", out_path)
@@ -233,6 +789,51 @@ def time_stretch_vc(base_dir: str, transcript_path: str):
     logger.info("VC time-stretching complete.")
 
 
+def _find_wav_data(buf) -> tuple[int, int]:
+    """
+    Locate the 'data' chunk of a RIFF/WAVE file.
+
+    Args:
+        buf: Bytes-like object (e.g. an mmap) holding the whole WAV file.
+
+    Returns:
+        tuple[int, int]: Byte offset and size of the audio data.
+    """
+    if buf[:4] != b"RIFF" or buf[8:12] != b"WAVE":
+        raise ValueError("Not a RIFF/WAVE file")
+
+    # Walk the chunks following the 12-byte RIFF header (chunks are padded to an even size)
+    pos = 12
+    while pos + 8 <= len(buf):
+        chunk_id, chunk_size = struct.unpack_from("<4sI", buf, pos)
+        if chunk_id == b"data":
+            return pos + 8, min(chunk_size, len(buf) - pos - 8)
+        pos += 8 + chunk_size + (chunk_size & 1)
+    raise ValueError("WAV file has no data chunk")
+
+
+def _wav_header(channels: int, sample_width: int, frame_rate: int, data_size: int) -> bytes:
+    """
+    Pack the 44-byte RIFF/WAVE header of a PCM WAV file.
+
+    Args:
+        channels (int):     Number of channels.
+        sample_width (int): Bytes per sample.
+        frame_rate (int):   Sample rate in Hz.
+        data_size (int):    Size of the audio data in bytes.
+
+    Returns:
+        bytes: The header, to be followed by the audio data.
+    """
+    block_align = channels * sample_width
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_size, b"WAVE",
+        b"fmt ", 16, 1, channels, frame_rate, frame_rate * block_align, block_align, sample_width * 8,
+        b"data", data_size,
+    )
+
+
 def split_audio_by_utterance(transcript_path: str, vocals_path: str, output_dir: str):
     """
     Split a vocals WAV file into per-utterance WAVs based on speaker turns and timestamps in the transcript.
@@ -246,19 +847,29 @@ def split_audio_by_utterance(transcript_path: str, vocals_path: str, output_dir:
     """
     logger.info("Splitting audio by utterances")
 
-    # Load transcript and audio
-    with open(transcript_path, "r", encoding="utf-8") as f:
-        transcript = json.load(f)
-    vocals = AudioSegment.from_wav(vocals_path)
-
-    # Prepare output directory
+    # Load transcript and read the audio format of the vocals. The wave module rejects float and
+    # WAVE_FORMAT_EXTENSIBLE files; those are loaded and sliced with pydub instead
+    transcript, by_speaker = load_transcript(transcript_path)
+    try:
+        with wave.open(vocals_path, "rb") as wf:
+            params = wf.getparams()
+    except wave.Error as e:
+        logger.debug("Cannot memory-map %s (%s), splitting it with pydub", vocals_path, e)
+        params = None
+        vocals = load_wav(vocals_path)
+        vocals_ms = len(vocals)
+    else:
+        frame_width = params.sampwidth * params.nchannels
+        vocals_ms = round(params.nframes * 1000 / params.framerate)
+
+    # Prepare the output directories of all speakers once
     speaker_root = os.path.join(output_dir, "speaker_audio")
-    os.makedirs(speaker_root, exist_ok=True)
+    for speaker_id in by_speaker:
+        os.makedirs(os.path.join(speaker_root, f"speaker_{speaker_id}", "utterances"), exist_ok=True)
 
-    # Initialize speaker utterance counters
+    # Work out the output file and time span of each utterance in one pass up front
     speaker_counts: dict[str, int] = {}
-
-    # Iterate over utterances
+    spans: list[tuple[str, int, int]] = []
     for i, utterance in enumerate(transcript):
         speaker_id = utterance["speaker"]
         start_ms = int(utterance["start"] * 1000)
@@ -269,25 +880,86 @@ def split_audio_by_utterance(transcript_path: str, vocals_path: str, output_dir:
             diff = int(next_utterance["start"] * 1000) - end_ms
             end_ms += min(500, diff)
         else:
-            diff = len(vocals) - end_ms
+            diff = vocals_ms - end_ms
             end_ms += min(500, diff)
-        
-        seg = vocals[start_ms:end_ms]
-
-        speaker_dir = os.path.join(speaker_root, f"speaker_{speaker_id}", "utterances")
-        os.makedirs(speaker_dir, exist_ok=True)
 
         # Increment this speaker's utterance count
         speaker_counts[speaker_id] = speaker_counts.get(speaker_id, 0) + 1
         utt_idx = speaker_counts[speaker_id]
 
+        speaker_dir = os.path.join(speaker_root, f"speaker_{speaker_id}", "utterances")
         filename = f"{speaker_id}_utt_{utt_idx:02d}.wav"
-        out_path = os.path.join(speaker_dir, filename)
-        seg.export(out_path, format="wav")
+        spans.append((os.path.join(speaker_dir, filename), start_ms, end_ms))
+
+    if params is None:
+        for out_path, start_ms, end_ms in spans:
+            vocals[start_ms:end_ms].export(out_path, format="wav")
+        logger.info("Finished splitting %d utterances across speakers", len(transcript))
+        return
+
+    # Memory-map the vocals, so each utterance is copied straight from the file without loading it whole
+    with open(vocals_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data_offset, data_size = _find_wav_data(mm)
+        data_end = data_offset + min(data_size, params.nframes * frame_width)
+
+        for out_path, start_ms, end_ms in spans:
+            # Convert the milliseconds to byte positions in the data chunk
+            start_byte = min(data_offset + start_ms * params.framerate // 1000 * frame_width, data_end)
+            end_byte = min(data_offset + end_ms * params.framerate // 1000 * frame_width, data_end)
+
+            # Write the header and the frames as they are in the vocals file (a view, not a copy)
+            n_bytes = max(0, end_byte - start_byte)
+            with open(out_path, "wb") as out, memoryview(mm)[start_byte:start_byte + n_bytes] as frames:
+                out.write(_wav_header(params.nchannels, params.sampwidth, params.framerate, n_bytes))
+                out.write(frames)
 
     logger.info("Finished splitting %d utterances across speakers", len(transcript))
 
 
+def _speaker_dirs(speaker_root: str) -> list[tuple[str, str]]:
+    """
+    List the speaker folders under 'speaker_root' in one directory scan.
+
+    Args:
+        speaker_root (str): The 'speaker_audio' directory.
+
+    Returns:
+        list[tuple[str, str]]: (speaker label, folder path) of each 'speaker_{X}' folder.
+    """
+    with os.scandir(speaker_root) as it:
+        return [
+            (entry.name.split("_", 1)[1], entry.path)
+            for entry in it
+            if entry.name.startswith("speaker_") and entry.is_dir()
+        ]
+
+
+def _utterance_files(directory: str, spk: str) -> list[str]:
+    """
+    List the '{spk}_utt_{XX}.wav' files of a speaker in one directory scan, in utterance order.
+
+    Args:
+        directory (str): Folder holding the utterance files.
+        spk (str):       Speaker label.
+
+    Returns:
+        list[str]: The file names, sorted by utterance number.
+    """
+    prefix = f"{spk}_utt_"
+    with os.scandir(directory) as it:
+        files = [
+            entry.name for entry in it
+            if entry.name.startswith(prefix) and entry.name.endswith(".wav") and entry.is_file()
+        ]
+
+    # Sort by the utterance number, so numbers past 99 keep their order
+    def natural_key(name: str):
+        num = name[len(prefix):-len(".wav")]
+        return (0, int(num), name) if num.isdigit() else (1, 0, name)
+
+    return sorted(files, key=natural_key)
+
+
 def build_all_reference_audios(base_dir: str, reference_window: int = 1):
     """
     Build reference audio files for each utterance by concatenating the utterance with its neighboring utterances within a specified window.
@@ -301,60 +973,120 @@ def build_all_reference_audios(base_dir: str, reference_window: int = 1):
     logger.info("Building reference audio for all speakers in %s", speaker_root)
 
     # Go through all speaker folders
-    for entry in os.listdir(speaker_root):
-        if not entry.startswith("speaker_"):
-            continue
-    
-        spk = entry.split("_", 1)[1]
-        spk_dir = os.path.join(speaker_root, entry)
+    for spk, spk_dir in _speaker_dirs(speaker_root):
         utt_dir = os.path.join(spk_dir, "utterances")
         ref_dir = os.path.join(spk_dir, "references")
 
         if not os.path.isdir(utt_dir):
-            logger.warning("Missing utterance dir for %s, skipping", entry)
+            logger.warning("Missing utterance dir for speaker %s, skipping", spk)
             continue
         os.makedirs(ref_dir, exist_ok=True)
 
-        # Find all utterance files for the speaker
-        files = sorted([
-            f for f in os.listdir(utt_dir)
-            if f.startswith(f"{spk}_utt_") and f.endswith(".wav")
-        ])
+        # Find all utterance files for the speaker, and index them by utterance number
+        files = _utterance_files(utt_dir, spk)
+        present = {
+            int(name[len(f"{spk}_utt_"):-len(".wav")]): os.path.join(utt_dir, name)
+            for name in files
+            if name[len(f"{spk}_utt_"):-len(".wav")].isdigit()
+        }
+
+        # Decoded utterances, as each one is part of several references. References are built in order,
+        # so only the current window of decoded utterances has to be kept
+        decoded: OrderedDict[str, tuple[tuple[int, int, int], bytes]] = OrderedDict()
+        max_decoded = 2 * reference_window + 1
 
         # For each utterance, build a reference file
         for idx, fname in enumerate(files):
             utt_id = f"{spk}_utt_{idx+1:02d}"
             idx_int = idx + 1
 
-            ref_paths = []
-            for offset in range(-reference_window, reference_window + 1):
-                neighbor_idx = idx_int + offset
-                if neighbor_idx < 1:
-                    continue
-                neighbor_fname = f"{spk}_utt_{neighbor_idx:02d}.wav"
-                neighbor_path = os.path.join(utt_dir, neighbor_fname)
-                if os.path.exists(neighbor_path):
-                    ref_paths.append(neighbor_path)
+            ref_paths = [
+                present[idx_int + offset]
+                for offset in range(-reference_window, reference_window + 1)
+                if idx_int + offset in present
+            ]
 
             if not ref_paths:
                 logger.warning("No valid references for %s", utt_id)
                 continue
-            
-            # Combine and save the reference file
-            combined = AudioSegment.empty()
-            for ref in ref_paths:
-                combined += AudioSegment.from_wav(ref)
 
+            # Collect the raw PCM frames of the neighbours
+            params = None
+            chunks = []
+            for ref in ref_paths:
+                if ref in decoded:
+                    decoded.move_to_end(ref)
+                else:
+                    with wave.open(ref, "rb") as wf:
+                        fmt = (wf.getnchannels(), wf.getsampwidth(), wf.getframerate())
+                        decoded[ref] = (fmt, wf.readframes(wf.getnframes()))
+                    if len(decoded) > max_decoded:
+                        decoded.popitem(last=False)
+                fmt, frames = decoded[ref]
+                if params is None:
+                    params = fmt
+                elif fmt != params:
+                    raise ValueError(f"Audio format of {ref} {fmt} does not match {ref_paths[0]} {params}")
+                chunks.append(frames)
+
+            # Save them as one reference file, writing the chunks one after another instead of joining them
             ref_out_path = os.path.join(ref_dir, f"{utt_id}_ref.wav")
-            combined.export(ref_out_path, format="wav")
+            with open(ref_out_path, "wb") as out:
+                out.write(_wav_header(*params, sum(map(len, chunks))))
+                out.writelines(chunks)
 
     logger.info("Finished building reference audio.")
 
 
+def _seed_vc_in_process_enabled() -> bool:
+    """
+    Check whether Seed-VC may be loaded into this interpreter. It is by default; set SEEDVC_SUBPROCESS=1 to
+    always run it in a separate process instead.
+
+    Returns:
+        bool: True if the in-process path should be tried.
+    """
+    return os.environ.get("SEEDVC_SUBPROCESS") != "1"
+
+
+def _seed_vc_python() -> str:
+    """
+    Return the python executable of the seed-vc environment (SEED_VC_PYTHON_PATH), or the current interpreter
+    if it is not set, i.e. when seed-vc's requirements are installed in this environment.
+
+    Returns:
+        str: Path to the python executable.
+    """
+    return os.environ.get("SEED_VC_PYTHON_PATH") or sys.executable
+
+
+def _get_in_process_vc(seed_vc_dir: str = "seed-vc") -> "SeedVCInProcess | None":
+    """
+    Return the shared in-process Seed-VC, loading it on first use.
+
+    Args:
+        seed_vc_dir (str): Path to the cloned seed-vc repository.
+
+    Returns:
+        SeedVCInProcess | None: The shared instance, or None if seed-vc cannot be loaded here.
+    """
+    global _IN_PROCESS_VC
+    if _IN_PROCESS_VC is None:
+        try:
+            _IN_PROCESS_VC = SeedVCInProcess(seed_vc_dir)
+        except Exception as e:
+            # Any failure while importing seed-vc (missing packages, torch/CUDA mismatches, ...) only rules out this path
+            logger.info("Seed-VC cannot be loaded here (%s: %s), using a separate process", type(e).__name__, e)
+            _IN_PROCESS_VC = False
+    return _IN_PROCESS_VC or None
+
+
 def voice_conversion(source: str, target: str, output_dir: str):
     """
     Perform voice conversion on a source audio file using seed-vc, making the source sound like the target speaker.
-    Runs the seed-vc inference script as a subprocess and saves the converted audio to the specified output directory.
+    Seed-VC is loaded into this interpreter and keeps its models loaded between calls. If it cannot be loaded
+    here, or SEEDVC_SUBPROCESS=1 is set, the seed-vc inference script is run as a subprocess instead.
+    The converted audio is saved to the specified output directory.
 
     Args:
         source (str): Path to the source audio file (e.g., TTS segment to convert).
@@ -362,10 +1094,18 @@ def voice_conversion(source: str, target: str, output_dir: str):
         output_dir (str): Directory where the voice-converted audio will be saved.
 
     Raises:
+        RuntimeError: If the in-process conversion fails.
         subprocess.CalledProcessError: If the seed-vc inference subprocess fails.
     """
     load_dotenv()
-    python_executable = os.environ["SEED_VC_PYTHON_PATH"]
+    vc = _get_in_process_vc() if _seed_vc_in_process_enabled() else None
+    if vc is not None:
+        error = vc.convert_batch([(source, target, output_dir)])[0]
+        if error:
+            raise RuntimeError(f"Voice conversion failed: {error}")
+        return
+
+    python_executable = _seed_vc_python()
     inference_script  = "seed-vc/inference.py"
 
     # Convert all paths to absolute
@@ -378,22 +1118,209 @@ def voice_conversion(source: str, target: str, output_dir: str):
         "--source", source,
         "--target", target,
         "--output", output_dir,
-        "--diffusion-steps", "50",
+        "--diffusion-steps", str(SEED_VC_DIFFUSION_STEPS),
         "--length-adjust", "1.0",
-        "--inference-cfg-rate", "0.7"
+        "--inference-cfg-rate", "0.7",
+        "--fp16", "True"
     ]
 
-    # Run the command and handle errors
-    try:
-        subprocess.run(command, check=True, capture_output=True, text=True, encoding="utf-8")
-    except subprocess.CalledProcessError as e:
-        print("Voice conversion subprocess failed!")
-        print("STDOUT:\n", e.stdout)
-        print("STDERR:\n", e.stderr)
-        raise
+    # Run the command with its output spooled to a temporary file, which is only read back if the conversion fails
+    with tempfile.TemporaryFile() as log:
+        try:
+            subprocess.run(command, check=True, stdout=log, stderr=subprocess.STDOUT)
+        except subprocess.CalledProcessError:
+            log.seek(0)
+            logger.error("Voice conversion subprocess failed!\nOUTPUT:\n%s", log.read().decode("utf-8", errors="replace"))
+            raise
+
+
+class SeedVCWorker:
+    """
+    Long-lived seed-vc process (see seed_vc_worker.py) that keeps the Seed-VC models loaded between conversions,
+    so the interpreter start-up, torch import and model load are paid once instead of once per utterance.
+    """
+
+    def __init__(self, seed_vc_dir: str = "seed-vc", log_path: str | None = None, device: int | None = None):
+        """
+        Start the worker process with the seed-vc python environment.
+
+        Args:
+            seed_vc_dir (str):     Path to the cloned seed-vc repository.
+            log_path (str | None): File that receives the worker's log output (discarded if None).
+            device (int | None):   GPU the worker is restricted to (via CUDA_VISIBLE_DEVICES), or None for the default.
+        """
+        load_dotenv()
+        python_executable = _seed_vc_python()
+
+        env = None
+        if device is not None:
+            env = {**os.environ, "CUDA_VISIBLE_DEVICES": str(device)}
+
+        self._log = open(log_path, "ab") if log_path else subprocess.DEVNULL
+        try:
+            self._proc = subprocess.Popen(
+                [python_executable, SEED_VC_WORKER_SCRIPT, "--seed-vc-dir", seed_vc_dir],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=self._log,
+                text=True,
+                encoding="utf-8",
+                bufsize=1,
+                env=env,
+            )
+        except BaseException:
+            # Do not leak the log file if the worker cannot be started (e.g. a wrong SEED_VC_PYTHON_PATH)
+            if self._log is not subprocess.DEVNULL:
+                self._log.close()
+            raise
+
+    def convert_batch(self, jobs: list[tuple[str, str, str]], diffusion_steps: int = SEED_VC_DIFFUSION_STEPS,
+                      length_adjust: float = 1.0, inference_cfg_rate: float = 0.7, fp16: bool = True) -> list[str | None]:
+        """
+        Convert a batch of source audio files to sound like their target speakers in a single request.
+
+        Args:
+            jobs (list[tuple[str, str, str]]): (source, target, output_dir) per conversion; the source is
+                                               converted to sound like the target and saved to output_dir.
+            diffusion_steps (int): Number of diffusion steps.
+            length_adjust (float): Length adjustment factor.
+            inference_cfg_rate (float): Classifier-free guidance rate.
+            fp16 (bool): Run inference in half precision (seed-vc's --fp16).
+
+        Returns:
+            list[str | None]: Per job, None on success or the error message of the failed conversion.
+
+        Raises:
+            RuntimeError: If the worker has exited.
+        """
+        request = {"jobs": [
+            {
+                "source": os.path.abspath(source),
+                "target": os.path.abspath(target),
+                "output": os.path.abspath(output_dir),
+                "diffusion_steps": diffusion_steps,
+                "length_adjust": length_adjust,
+                "inference_cfg_rate": inference_cfg_rate,
+                "fp16": fp16,
+            }
+            for source, target, output_dir in jobs
+        ]}
+        if self._proc.poll() is not None:
+            raise RuntimeError(f"Seed-VC worker exited with code {self._proc.returncode}")
+
+        try:
+            self._proc.stdin.write(json.dumps(request) + "\n")
+            self._proc.stdin.flush()
+            line = self._proc.stdout.readline()
+        except OSError as e:
+            raise RuntimeError(f"Lost connection to Seed-VC worker: {e}") from e
+        if not line:
+            raise RuntimeError(f"Seed-VC worker exited with code {self._proc.wait()}")
+
+        return [None if result["ok"] else result["error"] for result in json.loads(line)["results"]]
+
+    def close(self):
+        """
+        Stop the worker process.
+        """
+        if self._proc.poll() is None:
+            self._proc.stdin.close()
+            self._proc.wait()
+        if self._log is not subprocess.DEVNULL:
+            self._log.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class SeedVCInProcess:
+    """
+    Seed-VC run inside this interpreter (see seed_vc_worker.SeedVC), for environments where seed-vc's
+    dependencies are installed alongside auto_dubbing. Same interface as SeedVCWorker, without the IPC.
+    """
+
+    def __init__(self, seed_vc_dir: str = "seed-vc"):
+        """
+        Import seed-vc's inference module.
+
+        Args:
+            seed_vc_dir (str): Path to the cloned seed-vc repository.
+
+        Raises:
+            Exception: If seed-vc or its dependencies cannot be imported.
+        """
+        self._vc = SeedVC(seed_vc_dir)
+
+    def convert_batch(self, jobs: list[tuple[str, str, str]], diffusion_steps: int = SEED_VC_DIFFUSION_STEPS,
+                      length_adjust: float = 1.0, inference_cfg_rate: float = 0.7, fp16: bool = True) -> list[str | None]:
+        """
+        Convert a batch of source audio files to sound like their target speakers with the loaded models.
+
+        Args:
+            jobs (list[tuple[str, str, str]]): (source, target, output_dir) per conversion.
+            diffusion_steps (int): Number of diffusion steps.
+            length_adjust (float): Length adjustment factor.
+            inference_cfg_rate (float): Classifier-free guidance rate.
+            fp16 (bool): Run inference in half precision (seed-vc's --fp16).
+
+        Returns:
+            list[str | None]: Per job, None on success or the error message of the failed conversion.
+        """
+        results = self._vc.convert_batch([
+            {
+                "source": os.path.abspath(source),
+                "target": os.path.abspath(target),
+                "output": os.path.abspath(output_dir),
+                "diffusion_steps": diffusion_steps,
+                "length_adjust": length_adjust,
+                "inference_cfg_rate": inference_cfg_rate,
+                "fp16": fp16,
+            }
+            for source, target, output_dir in jobs
+        ])
+        return [None if result["ok"] else result["error"] for result in results]
+
+    def close(self):
+        """
+        Nothing to release; the models live as long as the interpreter.
+        """
 
+    def __enter__(self):
+        return self
 
-def process_all_voice_conversions(base_dir: str):
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_seed_vc(seed_vc_dir: str = "seed-vc", log_path: str | None = None,
+                 device: int | None = None) -> SeedVCInProcess | SeedVCWorker:
+    """
+    Load Seed-VC into this interpreter, or start a SeedVCWorker with the seed-vc python environment if it cannot
+    be loaded here or SEEDVC_SUBPROCESS=1 is set.
+
+    Args:
+        seed_vc_dir (str):     Path to the cloned seed-vc repository.
+        log_path (str | None): File that receives the worker's log output (discarded if None).
+        device (int | None):   GPU to run on. Pinning a GPU always uses a worker process, as CUDA_VISIBLE_DEVICES
+                               can only be set for a new process.
+
+    Returns:
+        SeedVCInProcess | SeedVCWorker: Object converting batches with convert_batch().
+    """
+    load_dotenv()
+    in_process = device is None and _seed_vc_in_process_enabled()
+    seed_vc = _get_in_process_vc(seed_vc_dir) if in_process else None
+    if seed_vc is not None:
+        logger.info("Running Seed-VC in-process")
+        return seed_vc
+    logger.info("Starting a Seed-VC worker process")
+    return SeedVCWorker(seed_vc_dir, log_path=log_path, device=device)
+
+
+def process_all_voice_conversions(base_dir: str, min_duration_ms: int = 200, devices: list[int] | None = None):
     """
     Perform Seed-VC voice conversion for all speakers using TTS outputs and prebuilt reference audio.
 
@@ -405,20 +1332,22 @@ def process_all_voice_conversions(base_dir: str):
         speaker_audio/speaker_{X}/tts_vc/{X}_utt_{XX}_vc.wav   # Voice-converted utterances
 
     Args:
-        base_dir (str): Root directory containing the 'speaker_audio' folders.
+        base_dir (str):        Root directory containing the 'speaker_audio' folders.
+        min_duration_ms (int): TTS utterances shorter than this (interjections) are copied through unconverted; 0
+                               converts every utterance. The copies are listed in 'tts_vc/unconverted.json' so
+                               trim_vc_start() leaves them alone.
+        devices (list[int] | None): GPUs to convert on. With more than one, a worker process is started per GPU
+                               and the speakers' batches are spread over them.
     """
     speaker_root = os.path.join(base_dir, "speaker_audio")
     logger.info("Running voice conversion using references under %s", speaker_root)
 
-    # Go throgh all the speaker folders
-    for entry in os.listdir(speaker_root):
-        if not entry.startswith("speaker_"):
-            continue
+    # Collect the conversion jobs of all speakers
+    speaker_jobs: list[tuple[str, str, list[tuple[str, str, str, str]]]] = []
 
+    # Go throgh all the speaker folders
+    for spk, spk_dir in _speaker_dirs(speaker_root):
         # Define paths
-        spk = entry.split("_", 1)[1]
-        spk_dir = os.path.join(speaker_root, entry)
-
         tts_dir = os.path.join(spk_dir, "tts")
         ref_dir = os.path.join(spk_dir, "references")
         vc_dir  = os.path.join(spk_dir, "tts_vc")
@@ -429,15 +1358,14 @@ def process_all_voice_conversions(base_dir: str):
         os.makedirs(vc_dir, exist_ok=True)
 
         # Find alle TTS-files for the speaker
-        files = sorted([
-            f for f in os.listdir(tts_dir)
-            if f.startswith(f"{spk}_utt_") and f.endswith(".wav")
-        ])
+        files = _utterance_files(tts_dir, spk)
         if not files:
             logger.warning("No TTS files for speaker %s", spk)
             continue
-        
-        # For each TTS-file, do voice conversion
+
+        # Collect the conversion jobs for this speaker
+        jobs: list[tuple[str, str, str, str]] = []
+        unconverted: list[str] = []
         for idx, fname in enumerate(files, start=1):
             utt_id = f"{spk}_utt_{idx:02d}"
             src    = os.path.join(tts_dir, fname)
@@ -447,23 +1375,96 @@ def process_all_voice_conversions(base_dir: str):
                 logger.warning("Missing reference for %s → skipping", utt_id)
                 continue
 
-            logger.info("Converting %s using reference %s", fname, os.path.basename(ref))
-            temp_out = os.path.join(vc_dir, f"temp_{idx:02d}")
-            try:
-                voice_conversion(src, ref, temp_out)
-            except subprocess.CalledProcessError as e:
-                logger.error("Seed-VC failed on %s: %s", utt_id, e)
-                shutil.rmtree(temp_out, ignore_errors=True)
+            # Copy very short utterances (interjections) through, as converting them is not worth the inference
+            with wave.open(src, "rb") as wf:
+                duration_ms = wf.getnframes() * 1000 / wf.getframerate()
+            if duration_ms < min_duration_ms:
+                logger.debug("Skipping VC for %s (%.0fms)", utt_id, duration_ms)
+                shutil.copyfile(src, os.path.join(vc_dir, f"{utt_id}_vc.wav"))
+                unconverted.append(f"{utt_id}_vc.wav")
                 continue
 
-            vc_outputs = [f for f in os.listdir(temp_out) if f.endswith(".wav")]
-            if not vc_outputs:
-                logger.error("No output .wav for %s", utt_id)
-                shutil.rmtree(temp_out, ignore_errors=True)
-                continue
+            temp_out = os.path.join(vc_dir, f"temp_{idx:02d}")
+            jobs.append((utt_id, src, ref, temp_out))
+
+        # Record the copied clips, replacing the list of an earlier run
+        unconverted_path = os.path.join(vc_dir, UNCONVERTED_VC_LIST)
+        if unconverted:
+            save_json(unconverted, unconverted_path)
+        elif os.path.exists(unconverted_path):
+            os.remove(unconverted_path)
+
+        if jobs:
+            speaker_jobs.append((spk, vc_dir, jobs))
+
+    if len(devices or []) > 1:
+        # One worker per GPU; the largest batches are handed out first to balance the load
+        log_paths = [os.path.join(base_dir, f"seed-vc.gpu{device}.log") for device in devices]
+        with contextlib.ExitStack() as stack:
+            # Close every worker started so far, also when a later one fails to start
+            workers = [
+                stack.enter_context(contextlib.closing(SeedVCWorker(log_path=log, device=device)))
+                for device, log in zip(devices, log_paths)
+            ]
+            idle: queue.Queue[SeedVCWorker] = queue.Queue()
+            for worker in workers:
+                idle.put(worker)
+
+            def convert_on_idle_worker(spk: str, vc_dir: str, jobs: list[tuple[str, str, str, str]]):
+                worker = idle.get()
+                try:
+                    _convert_speaker(worker, spk, vc_dir, jobs)
+                finally:
+                    idle.put(worker)
+
+            with ThreadPoolExecutor(max_workers=len(workers)) as executor:
+                futures = [
+                    executor.submit(convert_on_idle_worker, *job)
+                    for job in sorted(speaker_jobs, key=lambda job: len(job[2]), reverse=True)
+                ]
+                for future in as_completed(futures):
+                    future.result()
+    else:
+        # Load Seed-VC once for all conversions
+        device = devices[0] if devices else None
+        with open_seed_vc(log_path=os.path.join(base_dir, "seed-vc.log"), device=device) as worker:
+            for spk, vc_dir, jobs in speaker_jobs:
+                _convert_speaker(worker, spk, vc_dir, jobs)
+
+    logger.info("Voice conversion complete.")
+
+
+def _convert_speaker(worker: "SeedVCInProcess | SeedVCWorker", spk: str, vc_dir: str,
+                     jobs: list[tuple[str, str, str, str]]):
+    """
+    Convert all utterances of a speaker in one batch and move the results to '{utt_id}_vc.wav' in 'vc_dir'.
+
+    Args:
+        worker (SeedVCInProcess | SeedVCWorker): Seed-VC to convert with.
+        spk (str):                               Speaker label.
+        vc_dir (str):                            The speaker's 'tts_vc' folder.
+        jobs (list[tuple[str, str, str, str]]):  (utt_id, source, reference, temporary output dir) per utterance.
+    """
+    logger.info("Converting %d utterances of speaker %s", len(jobs), spk)
+    try:
+        errors = worker.convert_batch([(src, ref, temp_out) for _, src, ref, temp_out in jobs])
+    except RuntimeError as e:
+        logger.error("Seed-VC failed on speaker %s: %s", spk, e)
+        return
+
+    for (utt_id, _, _, temp_out), error in zip(jobs, errors):
+        if error:
+            logger.error("Seed-VC failed on %s: %s", utt_id, error)
+            shutil.rmtree(temp_out, ignore_errors=True)
+            continue
 
-            final_path = os.path.join(vc_dir, f"{utt_id}_vc.wav")
-            shutil.move(os.path.join(temp_out, vc_outputs[0]), final_path)
+        with os.scandir(temp_out) as it:
+            vc_output = next((e.path for e in it if e.name.endswith(".wav")), None)
+        if vc_output is None:
+            logger.error("No output .wav for %s", utt_id)
             shutil.rmtree(temp_out, ignore_errors=True)
+            continue
 
-    logger.info("Voice conversion complete.")
\ No newline at end of file
+        final_path = os.path.join(vc_dir, f"{utt_id}_vc.wav")
+        shutil.move(vc_output, final_path)
+        shutil.rmtree(temp_out, ignore_errors=True)
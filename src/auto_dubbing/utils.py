@@ -0,0 +1,162 @@
+import os
+import logging
+import subprocess
+import wave
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import orjson
+import soundfile as sf
+from pydub import AudioSegment
+
+logger = logging.getLogger(__name__)
+
+
+def load_json(path: str | Path) -> Any:
+    """
+    Load a JSON file using orjson.
+
+    Args:
+        path (str | Path): Path to the JSON file.
+
+    Returns:
+        Any: The decoded JSON content.
+    """
+    with open(path, "rb") as f:
+        return orjson.loads(f.read())
+
+
+def save_json(obj: Any, path: str | Path) -> None:
+    """
+    Write an object to a JSON file using orjson (UTF-8, indented by two spaces).
+
+    Args:
+        obj (Any): The object to serialize.
+        path (str | Path): Path of the JSON file to write.
+    """
+    with open(path, "wb") as f:
+        f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+
+
+@lru_cache(maxsize=8)
+def _load_transcript(path: str, mtime_ns: int, size: int) -> tuple[list[dict], dict[str, list[dict]]]:
+    transcript = load_json(path)
+    by_speaker: dict[str, list[dict]] = {}
+    for utterance in transcript:
+        by_speaker.setdefault(utterance["speaker"], []).append(utterance)
+    return transcript, by_speaker
+
+
+def load_transcript(path: str | Path) -> tuple[list[dict], dict[str, list[dict]]]:
+    """
+    Load a transcript JSON and index its utterances by speaker. The result is cached per file
+    (keyed by path, modification time and size), so pipeline steps reading the same transcript
+    parse and index it only once. The returned objects are shared and must not be modified.
+
+    Args:
+        path (str | Path): Path to the transcript JSON file (list of utterance dicts with a 'speaker' field).
+
+    Returns:
+        tuple[list[dict], dict[str, list[dict]]]: The utterances in order, and each speaker's utterances
+        in order (the n-th entry is the speaker's utterance n, as used in the '{X}_utt_{n}' file names).
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    return _load_transcript(path, stat.st_mtime_ns, stat.st_size)
+
+
+def load_wav(path: str | Path) -> AudioSegment:
+    """
+    Load a PCM WAV file into an AudioSegment by reading its frames with the wave module, skipping
+    pydub's decoding and copying. Falls back to AudioSegment.from_file for formats the wave module
+    or pydub cannot take as raw data (e.g. float or 24-bit WAVs).
+
+    Args:
+        path (str | Path): Path to the WAV file.
+
+    Returns:
+        AudioSegment: The loaded audio.
+    """
+    try:
+        with wave.open(str(path), "rb") as wf:
+            if wf.getsampwidth() in (1, 2, 4):
+                return AudioSegment(
+                    data=wf.readframes(wf.getnframes()),
+                    sample_width=wf.getsampwidth(),
+                    frame_rate=wf.getframerate(),
+                    channels=wf.getnchannels(),
+                )
+    except wave.Error:
+        pass
+    logger.debug("Falling back to pydub decoding for %s", path)
+    return AudioSegment.from_file(path)
+
+
+def save_wav(audio: AudioSegment, path: str | Path) -> None:
+    """
+    Write an AudioSegment to a WAV file with soundfile (libsndfile), without going through pydub's export.
+    8-bit audio, which soundfile cannot take as raw samples, is written with pydub instead.
+
+    Args:
+        audio (AudioSegment): Audio to write.
+        path (str | Path):    Path of the WAV file to write.
+    """
+    subtype = {2: "PCM_16", 4: "PCM_32"}.get(audio.sample_width)
+    if subtype is None:
+        audio.export(path, format="wav")
+        return
+
+    dtype = np.int16 if audio.sample_width == 2 else np.int32
+    samples = np.frombuffer(audio.raw_data, dtype=dtype).reshape(-1, audio.channels)
+    sf.write(path, samples, audio.frame_rate, subtype=subtype, format="WAV")
+
+
+def _last_rewrite(line: bytes) -> bytes:
+    """
+    Return what a terminal would show for a line whose parts are separated by carriage returns: progress bars
+    redraw themselves with '\r', so only the last non-empty part is kept.
+
+    Args:
+        line (bytes): Output line, without its newline.
+
+    Returns:
+        bytes: The last non-empty '\r'-separated part of the line.
+    """
+    return next((part for part in reversed(line.split(b"\r")) if part), b"")
+
+
+def run_command(cmd: list[str], tail_lines: int = 200, max_line_bytes: int = 4096) -> None:
+    """
+    Run a command with its stdout discarded, keeping only the last lines of its stderr. Unlike capturing
+    the output, memory use stays bounded for tools printing long progress bars, and nothing is decoded
+    unless the command fails. Lines are split at newlines and progress redraws ('\r') are collapsed to
+    their final state, so the kept tail holds the last messages rather than a wall of progress updates.
+
+    Args:
+        cmd (list[str]):      The command to run.
+        tail_lines (int):     Number of trailing stderr lines kept for the error.
+        max_line_bytes (int): Maximum length kept of a single line (its end is kept).
+
+    Raises:
+        subprocess.CalledProcessError: If the command exits with a non-zero code; its stderr holds the kept lines.
+    """
+    tail: deque[bytes] = deque(maxlen=tail_lines)
+    pending = b""
+    with subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE) as proc:
+        # Drain stderr as it is written (stdout is not piped), so the pipe never fills up and blocks the command
+        while chunk := proc.stderr.read1(1 << 16):
+            *lines, pending = (pending + chunk).split(b"\n")
+            tail.extend(_last_rewrite(line)[-max_line_bytes:] + b"\n" for line in lines)
+            # Keep the unfinished line bounded as well, even if it never ends with a newline
+            pending = _last_rewrite(pending)[-max_line_bytes:] + (b"\r" if pending.endswith(b"\r") else b"")
+        if pending.strip(b"\r"):
+            tail.append(_last_rewrite(pending)[-max_line_bytes:] + b"\n")
+        returncode = proc.wait()
+
+    if returncode:
+        stderr = b"".join(tail).decode("utf-8", errors="replace")
+        logger.error("Command %s failed with exit code %d:\n%s", cmd[0], returncode, stderr)
+        raise subprocess.CalledProcessError(returncode, cmd, stderr=stderr)
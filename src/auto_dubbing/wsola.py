@@ -0,0 +1,70 @@
+import numpy as np
+
+
+def wsola(samples: np.ndarray, sample_rate: int, ratio: float, frame_ms: float = 20.0,
+          tolerance_ms: float = 10.0) -> np.ndarray:
+    """
+    Time-stretch audio with WSOLA (waveform similarity overlap-add). Hann-windowed frames are taken from
+    the input every 'frame / 2 / ratio' samples and overlap-added every 'frame / 2' samples; each frame is
+    shifted within the tolerance to the position whose normalized cross-correlation with the natural
+    continuation of the previous frame is highest.
+
+    Args:
+        samples (np.ndarray): Audio of shape (n_samples, channels), as floats.
+        sample_rate (int):    Sample rate of the audio.
+        ratio (float):        Stretch ratio; values above 1.0 lengthen the audio, values below 1.0 shorten it.
+        frame_ms (float):     Frame length in milliseconds.
+        tolerance_ms (float): Maximum shift of a frame in milliseconds.
+
+    Returns:
+        np.ndarray: Stretched audio of shape (round(n_samples * ratio), channels).
+
+    Raises:
+        ValueError: If the ratio is not positive.
+    """
+    if ratio <= 0:
+        raise ValueError(f"Stretch ratio must be positive, got {ratio}")
+
+    samples = samples.astype(np.float32, copy=False)
+    n_in = len(samples)
+    n_out = round(n_in * ratio)
+    if ratio == 1.0 or n_in == 0:
+        return samples.copy()
+
+    frame = max(4, int(sample_rate * frame_ms / 1000)) // 2 * 2
+    syn_hop = frame // 2
+    ana_hop = syn_hop / ratio
+    tol = int(sample_rate * tolerance_ms / 1000)
+    window = np.hanning(frame).astype(np.float32)
+    n_frames = n_out // syn_hop + 2
+
+    # Pad the input so every frame, natural continuation and search region lies inside it, for any ratio:
+    # the furthest read is the search region of the frame after the last one
+    pad = tol + frame
+    furthest = pad + round(n_frames * ana_hop) + tol + frame
+    x = np.pad(samples, ((pad, max(0, furthest - n_in - pad) + syn_hop + tol), (0, 0)))
+    mono = x.mean(axis=1)
+
+    # Energies of all frame-length windows, to normalize the correlations in the search regions
+    energy = np.concatenate([[0.0], np.cumsum(mono.astype(np.float64) ** 2)])
+
+    out = np.zeros((n_frames * syn_hop + frame, x.shape[1]), dtype=np.float32)
+    norm = np.zeros(len(out), dtype=np.float32)
+
+    delta = 0
+    for k in range(n_frames):
+        pos = pad + round(k * ana_hop) + delta
+        out_pos = k * syn_hop
+        out[out_pos:out_pos + frame] += x[pos:pos + frame] * window[:, None]
+        norm[out_pos:out_pos + frame] += window
+
+        # Shift the next frame to best match how this frame would naturally continue
+        natural = mono[pos + syn_hop:pos + syn_hop + frame]
+        next_pos = pad + round((k + 1) * ana_hop)
+        lo, hi = next_pos - tol, next_pos + tol + frame
+        corr = np.correlate(mono[lo:hi], natural, mode="valid")
+        window_energy = energy[lo + frame:hi + 1] - energy[lo:hi - frame + 1]
+        delta = int(np.argmax(corr / np.sqrt(np.maximum(window_energy, 1e-12)))) - tol
+
+    out /= np.maximum(norm, 1e-3)[:, None]
+    return out[:n_out]
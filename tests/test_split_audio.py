@@ -0,0 +1,43 @@
+import json
+import shutil
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from auto_dubbing.tts import split_audio_by_utterance
+
+SAMPLE_RATE = 16000
+
+
+@pytest.mark.parametrize("fmt, subtype", [
+    ("WAV", "PCM_16"),
+    ("WAVEX", "PCM_16"),
+    pytest.param("WAV", "FLOAT", marks=pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="needs ffmpeg")),
+])
+def test_split_matches_vocals(tmp_path, fmt, subtype):
+    # Float and WAVE_FORMAT_EXTENSIBLE vocals are not readable by the wave module and take the pydub path
+    rng = np.random.default_rng(0)
+    vocals = rng.uniform(-0.5, 0.5, (3 * SAMPLE_RATE, 2)).astype(np.float32)
+    vocals_path = tmp_path / "vocals.wav"
+    sf.write(vocals_path, vocals, SAMPLE_RATE, format=fmt, subtype=subtype)
+    expected, _ = sf.read(vocals_path, dtype="float32")
+
+    transcript = [
+        {"speaker": "A", "start": 0.1, "end": 0.8},
+        {"speaker": "B", "start": 1.0, "end": 1.5},
+        {"speaker": "A", "start": 2.0, "end": 2.9},
+    ]
+    transcript_path = tmp_path / "transcript.json"
+    transcript_path.write_text(json.dumps(transcript))
+
+    split_audio_by_utterance(str(transcript_path), str(vocals_path), str(tmp_path))
+
+    # Each utterance is padded with up to 500 ms of the gap that follows it
+    spans = {"A_utt_01": (0.1, 1.0), "B_utt_01": (1.0, 2.0), "A_utt_02": (2.0, 3.0)}
+    for utt_id, (start, end) in spans.items():
+        speaker = utt_id.split("_")[0]
+        samples, sample_rate = sf.read(tmp_path / "speaker_audio" / f"speaker_{speaker}" / "utterances" / f"{utt_id}.wav",
+                                       dtype="float32")
+        assert sample_rate == SAMPLE_RATE
+        np.testing.assert_allclose(samples, expected[round(start * SAMPLE_RATE):round(end * SAMPLE_RATE)], atol=1e-3)
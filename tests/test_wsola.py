@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from auto_dubbing.wsola import wsola
+
+SAMPLE_RATE = 24000
+
+
+def sine(freq: float, seconds: float, amplitude: float = 0.5, channels: int = 1) -> np.ndarray:
+    t = np.arange(int(SAMPLE_RATE * seconds)) / SAMPLE_RATE
+    wave = (amplitude * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+    return np.repeat(wave[:, None], channels, axis=1)
+
+
+def dominant_frequency(samples: np.ndarray) -> float:
+    mono = samples.mean(axis=1)
+    spectrum = np.abs(np.fft.rfft(mono * np.hanning(len(mono))))
+    return np.fft.rfftfreq(len(mono), 1 / SAMPLE_RATE)[np.argmax(spectrum)]
+
+
+@pytest.mark.parametrize("ratio", [0.25, 0.5, 0.75, 0.9, 1.1, 1.25, 2.0, 4.0])
+@pytest.mark.parametrize("channels", [1, 2])
+def test_output_length_matches_ratio(ratio, channels):
+    samples = sine(220, 1.3, channels=channels)
+    stretched = wsola(samples, SAMPLE_RATE, ratio)
+    assert stretched.shape == (round(len(samples) * ratio), channels)
+
+
+@pytest.mark.parametrize("n_samples", [0, 1, 100, 481, 24000])
+@pytest.mark.parametrize("ratio", [0.75, 1.25])
+def test_edge_ratios_on_short_inputs(n_samples, ratio):
+    samples = np.random.default_rng(0).uniform(-0.5, 0.5, (n_samples, 1)).astype(np.float32)
+    stretched = wsola(samples, SAMPLE_RATE, ratio)
+    assert stretched.shape == (round(n_samples * ratio), 1)
+    assert np.all(np.isfinite(stretched))
+
+
+def test_unit_ratio_returns_input_unchanged():
+    samples = sine(440, 0.5, channels=2)
+    stretched = wsola(samples, SAMPLE_RATE, 1.0)
+    np.testing.assert_array_equal(stretched, samples)
+    assert stretched is not samples
+
+
+@pytest.mark.parametrize("ratio", [0.75, 1.25])
+def test_pitch_and_level_are_preserved(ratio):
+    samples = sine(300, 1.0)
+    stretched = wsola(samples, SAMPLE_RATE, ratio)
+
+    assert dominant_frequency(stretched) == pytest.approx(300, abs=2)
+    # Away from the edges, the level matches the input and the waveform has no overlap-add dropouts
+    body = stretched[SAMPLE_RATE // 20:-SAMPLE_RATE // 20, 0]
+    assert np.sqrt(np.mean(body ** 2)) == pytest.approx(0.5 / np.sqrt(2), rel=0.05)
+    assert np.max(np.abs(body)) == pytest.approx(0.5, rel=0.05)
+
+
+def test_search_prefers_similar_over_loud_frames():
+    # A quiet tone with short loud clicks: lengthening must not latch onto (and repeat) the clicks just
+    # because they correlate strongly in absolute terms
+    samples = sine(200, 2.0, amplitude=0.05)
+    rng = np.random.default_rng(0)
+    for start in range(0, len(samples), SAMPLE_RATE // 10):
+        samples[start:start + 120, 0] += rng.uniform(-0.9, 0.9, 120).astype(np.float32)
+
+    stretched = wsola(samples, SAMPLE_RATE, 1.25)
+
+    def click_energy(audio):
+        return np.sum(audio[np.abs(audio[:, 0]) > 0.2] ** 2)
+
+    assert click_energy(stretched) < 1.1 * click_energy(samples)
+
+
+def test_rejects_non_positive_ratio():
+    with pytest.raises(ValueError):
+        wsola(sine(200, 0.1), SAMPLE_RATE, 0.0)